@@ -20,6 +20,7 @@ from homeassistant.helpers import issue_registry as ir
 from .const import DOMAIN, LICENSE_DATA_KEY, LICENSE_PURCHASE_URL
 from .coordinator import MyElectricaCoordinator
 from .license import LicenseManager
+from .storage import async_get_token_store, async_remove_snapshot
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -82,7 +83,7 @@ def _update_license_notifications(hass: HomeAssistant, mgr: LicenseManager) -> N
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: MyElectricaConfigEntry) -> bool:
-    """Configurare intrare: creează coordinator, face primul refresh, setează platformele."""
+    """Configurare intrare: creează coordinator, restaurează datele sau face primul refresh, setează platformele."""
     _LOGGER.debug("[MyElectrica] Setup entry_id=%s", entry.entry_id)
 
     hass.data.setdefault(DOMAIN, {})
@@ -287,19 +288,34 @@ async def async_setup_entry(hass: HomeAssistant, entry: MyElectricaConfigEntry)
         )
 
     coordinator = MyElectricaCoordinator(hass, entry)
-    try:
-        await coordinator.async_config_entry_first_refresh()
-    except Exception as err:
-        _LOGGER.error(
-            "[MyElectrica] Prima actualizare eșuată: %s", err
-        )
-        raise
+
+    # Pornire rapidă: cu un snapshot valid, platformele pornesc imediat cu
+    # ultimele valori, iar refresh-ul real rulează în fundal.  Fără
+    # snapshot (prima pornire), așteptăm primul refresh ca înainte.
+    restored = await coordinator.async_restore_snapshot()
+    if not restored:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception as err:
+            _LOGGER.error(
+                "[MyElectrica] Prima actualizare eșuată: %s", err
+            )
+            raise
 
     # Stocăm coordinator-ul direct pe entry (pattern modern)
     entry.runtime_data = coordinator
+    # Oprește timer-ele coordinator-ului / API-ului la descărcare
+    entry.async_on_unload(coordinator.async_shutdown)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if restored:
+        entry.async_create_background_task(
+            hass,
+            coordinator.async_refresh(),
+            f"{DOMAIN}_refresh_{entry.entry_id}",
+        )
+
     _LOGGER.debug("[MyElectrica] Setup complet pentru entry_id=%s", entry.entry_id)
     return True
 
@@ -386,6 +402,12 @@ async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
         entry.entry_id,
     )
 
+    # Token-ul de sesiune și snapshot-ul datelor nu mai sunt necesare
+    username = entry.data.get("username")
+    if username:
+        await async_get_token_store(hass).async_set(username, None)
+    await async_remove_snapshot(hass, entry.entry_id)
+
     # Verifică dacă mai sunt entry-uri rămase
     remaining = hass.config_entries.async_entries(DOMAIN)
     if not remaining:
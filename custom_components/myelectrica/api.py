@@ -2,21 +2,52 @@
 API Manager pentru integrarea MyElectrica România.
 
 Se ocupă de autentificare (login + token) și de toate request-urile
-către API-ul MyElectrica.  Include retry automat la 401 (token expirat).
+către API-ul MyElectrica.  Include retry automat la 401 (token expirat),
+cu re-autentificare single-flight: request-urile care primesc 401 în
+paralel așteaptă un singur login comun și sunt apoi reluate.
+
+Expirarea token-ului este urmărită proactiv (claim-ul `exp` când
+token-ul este JWT, altfel o durată de viață învățată din 401-uri),
+iar reîmprospătarea are loc în fundal, înainte de expirare.  Token-ul
+este salvat în TokenStore și restaurat după restart-ul Home Assistant.
+
+Răspunsurile GET sunt păstrate într-un cache cu TTL per endpoint
+(ResponseCache), ocolit explicit la refresh-urile forțate.
+
+Erorile tranzitorii (5xx, 429, timeout) sunt reîncercate conform
+RetryPolicy (backoff exponențial cu jitter, Retry-After respectat);
+trimiterea indexului nu este reluată orbește.  Un circuit breaker
+per familie de endpoint-uri oprește request-urile cât timp backend-ul
+este căzut și detectează revenirea cu un singur request de probă.
+Toate instanțele împart un rate limiter (token bucket) comun.
 """
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import json
 import logging
-from datetime import datetime, timedelta
+import time
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timedelta
+from typing import Any, TypeVar
 
 import aiohttp
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
 
+from .cache import ResponseCache
 from .const import (
+    BILLING_HISTORY_DAYS,
+    CACHE_TTL,
+    DOMAIN,
+    HANDOFF_TTL,
     HEADERS_POST,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_PER_SECOND,
     URL_CLIENT_DATA,
     URL_CONTRACT_NLC,
     URL_CONVENTION,
@@ -28,12 +59,160 @@ from .const import (
     URL_READINGS,
     URL_SET_INDEX,
 )
+from .models import compact_response
+from .resilience import (
+    RETRYABLE_STATUSES,
+    CircuitBreaker,
+    RetryableError,
+    RetryPolicy,
+    TokenBucketLimiter,
+    parse_retry_after,
+)
+from .storage import TokenStore
 
 _LOGGER = logging.getLogger(__name__)
 
 # Timeout global pentru orice request (secunde)
 REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30)
 
+_T = TypeVar("_T")
+
+
+# Cheia rate limiter-ului comun în hass.data[DOMAIN]
+RATE_LIMITER_KEY = "_rate_limiter"
+# Limitele cerute de intrările încărcate: entry_id → (rată, rafală)
+RATE_LIMITS_KEY = "_rate_limits"
+
+
+@callback
+def async_get_rate_limiter(hass: HomeAssistant) -> TokenBucketLimiter:
+    """Rate limiter-ul comun tuturor instanțelor MyElectricaAPI."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    limiter: TokenBucketLimiter | None = domain_data.get(RATE_LIMITER_KEY)
+    if limiter is None:
+        limiter = domain_data[RATE_LIMITER_KEY] = TokenBucketLimiter()
+    return limiter
+
+
+@callback
+def async_set_entry_rate_limits(
+    hass: HomeAssistant,
+    entry_id: str,
+    rate: float | None,
+    burst: int | None,
+) -> TokenBucketLimiter:
+    """
+    Înregistrează limitele unei intrări și recalculează limiter-ul.
+
+    O intrare fără rată (sau cu rata 0) nu cere limitare.
+    """
+    limits = hass.data.setdefault(DOMAIN, {}).setdefault(RATE_LIMITS_KEY, {})
+    rate = float(rate or RATE_LIMIT_PER_SECOND)
+    if rate > 0:
+        limits[entry_id] = (rate, int(burst or RATE_LIMIT_BURST))
+    else:
+        limits.pop(entry_id, None)
+    return _async_apply_rate_limits(hass)
+
+
+@callback
+def async_remove_entry_rate_limits(hass: HomeAssistant, entry_id: str) -> None:
+    """Scoate limitele unei intrări descărcate și recalculează limiter-ul."""
+    domain_data = hass.data.get(DOMAIN)
+    if not domain_data:
+        return
+    domain_data.get(RATE_LIMITS_KEY, {}).pop(entry_id, None)
+    if RATE_LIMITER_KEY in domain_data:
+        _async_apply_rate_limits(hass)
+
+
+@callback
+def _async_apply_rate_limits(hass: HomeAssistant) -> TokenBucketLimiter:
+    """
+    Aplică cea mai restrictivă limită dintre intrările încărcate care
+    au cerut-o (limita protejează același backend); fără nicio cerere,
+    ritmul nu este limitat.
+    """
+    limiter = async_get_rate_limiter(hass)
+    limits = hass.data[DOMAIN].get(RATE_LIMITS_KEY) or {}
+    limiter.configure(
+        min((rate for rate, _ in limits.values()), default=RATE_LIMIT_PER_SECOND),
+        min((burst for _, burst in limits.values()), default=RATE_LIMIT_BURST),
+    )
+    return limiter
+
+
+# Predarea flow → coordinator: ierarhia descărcată în config / options
+# flow seamănă cache-ul primului refresh.  Cheia este în afara
+# hass.data[DOMAIN], care se șterge la descărcarea ultimei intrări
+# (reîncărcarea din options flow).  Token-ul trece deja prin TokenStore.
+HANDOFF_DATA_KEY = f"{DOMAIN}_handoff"
+
+
+@callback
+def async_store_handoff(
+    hass: HomeAssistant, username: str, hierarchy_raw: dict
+) -> None:
+    """Păstrează pe termen scurt ierarhia obținută într-un flow."""
+    pending = hass.data.setdefault(HANDOFF_DATA_KEY, {})
+    pending[username.strip().lower()] = (
+        time.time() + HANDOFF_TTL,
+        hierarchy_raw,
+    )
+
+
+@callback
+def async_pop_handoff(hass: HomeAssistant, username: str) -> dict | None:
+    """Preia (o singură dată) ierarhia predată de flow, dacă e recentă."""
+    pending: dict[str, tuple[float, dict]] = hass.data.get(HANDOFF_DATA_KEY, {})
+    now = time.time()
+    for key in [k for k, (expires, _) in pending.items() if expires <= now]:
+        del pending[key]
+    item = pending.pop(username.strip().lower(), None)
+    return item[1] if item else None
+
+
+class _TokenExpired(Exception):
+    """API-ul a răspuns 401 — token-ul folosit nu mai este valid."""
+
+
+# Reîmprospătăm token-ul cu cel mult atâtea secunde înainte de expirare
+TOKEN_REFRESH_MARGIN = 300
+
+# Durata minimă de viață acceptată când o învățăm din 401-uri (secunde)
+TOKEN_MIN_LIFETIME = 60
+
+# Câte 401-uri neanticipate consecutive sunt necesare înainte ca durata
+# învățată să scadă, și cât timp rămâne valabilă o observație (secunde).
+# Un singur 401 timpuriu (ex. sesiune revocată la login pe site) nu
+# fixează o durată scurtă; observațiile vechi expiră, iar durata crește
+# la loc.
+TOKEN_LIFETIME_CONFIRMATIONS = 2
+TOKEN_LIFETIME_SAMPLE_TTL = 24 * 3600
+
+
+def _format_start(now: datetime, start: date | None) -> str:
+    """Data de început pentru facturi / plăți (implicit: acum − 2 ani)."""
+    if start is None:
+        start = (now - timedelta(days=BILLING_HISTORY_DAYS)).date()
+    return start.strftime("%Y-%m-%d")
+
+
+def _jwt_expiry(token: str) -> float | None:
+    """Returnează claim-ul `exp` (epoch) dacă token-ul este un JWT, altfel None."""
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    payload = parts[1] + "=" * (-len(parts[1]) % 4)
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except ValueError:
+        return None
+    exp = claims.get("exp") if isinstance(claims, dict) else None
+    if isinstance(exp, (int, float)) and not isinstance(exp, bool):
+        return float(exp)
+    return None
+
 
 class MyElectricaAPI:
     """Manager API pentru integrarea MyElectrica."""
@@ -43,21 +222,74 @@ class MyElectricaAPI:
         hass: HomeAssistant,
         username: str,
         password: str,
+        proactive_refresh: bool = False,
+        token_store: TokenStore | None = None,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: TokenBucketLimiter | None = None,
+        compact: bool = False,
     ) -> None:
         self._hass = hass
         self._username = username
         self._password = password
         self._session = async_get_clientsession(self._hass)
         self._token: str | None = None
+        # Login-ul în curs (partajat de toate request-urile care așteaptă)
+        self._login_task: asyncio.Task[bool] | None = None
+
+        # Evidența expirării token-ului (epoch, secunde)
+        self._token_issued_at: float | None = None
+        self._token_expires_at: float | None = None
+        self._token_expiry_source: str | None = None  # "jwt" / "învățată"
+        self._learned_lifetime: float | None = None
+        # Observațiile din care se deduce durata: (moment, vârsta la 401)
+        self._lifetime_samples: list[tuple[float, float]] = []
+
+        # Reîmprospătare programată înainte de expirare (doar pentru
+        # instanța coordinator-ului; config flow-ul nu are nevoie de ea)
+        self._proactive_refresh = proactive_refresh
+        self._cancel_refresh_timer: CALLBACK_TYPE | None = None
+
+        # Cache persistent al token-ului (supraviețuiește restart-urilor HA)
+        self._token_store = token_store
+        self._token_restored = False
+
+        # Cache de răspunsuri GET (TTL per endpoint, LRU)
+        self.cache = ResponseCache()
+
+        # Reîncercări pentru erori tranzitorii + contoare per endpoint
+        self._retry_policy = retry_policy or RetryPolicy()
+        self.retry_stats: dict[str, dict[str, int]] = {}
+
+        # Circuit breaker per familie de endpoint-uri (+ "login")
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+        # Rate limiter comun tuturor intrărilor (vezi async_get_rate_limiter)
+        self.rate_limiter = rate_limiter
+
+        # Retenție compactă: răspunsurile sunt reduse la câmpurile folosite
+        # înainte de cache (vezi models.compact_response)
+        self.compact = compact
+
+    async def _async_throttle(self) -> None:
+        """Așteaptă permisiunea rate limiter-ului înaintea unui request."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
 
     # ── Autentificare ────────────────────────────
 
-    async def async_login(self) -> bool:
-        """Autentificare și obținere token.  Returnează True la succes."""
+    async def _async_obtain_token(self) -> str | None:
+        """Execută login-ul și returnează token-ul nou (sau None)."""
+        breaker = self._breaker("login")
+        permit = breaker.allow()
+        if permit is None:
+            _LOGGER.debug("[MyElectrica] Circuit deschis pentru login — omis")
+            return None
+
         payload = {
             "email": self._username,
             "parola": self._password,
         }
+        await self._async_throttle()
         try:
             async with self._session.post(
                 URL_LOGIN,
@@ -71,58 +303,514 @@ class MyElectricaAPI:
                         resp.status,
                         await resp.text(),
                     )
-                    self._token = None
-                    return False
+                    if resp.status in RETRYABLE_STATUSES:
+                        breaker.record_failure(permit)
+                    else:
+                        breaker.record_success(permit)
+                    return None
 
+                breaker.record_success(permit)
                 data = await resp.json()
                 _LOGGER.debug("[MyElectrica] Login response data: %s", data)
 
-                if data.get("error") is False:
-                    self._token = data.get("app_token")
+                if data.get("error") is False and data.get("app_token"):
                     _LOGGER.debug("[MyElectrica] Login OK — token obținut")
-                    return True
+                    return data["app_token"]
 
                 _LOGGER.error("[MyElectrica] Login respins de API: %s", data)
 
         except aiohttp.ClientError as err:
             _LOGGER.error("[MyElectrica] Excepție la login: %s", err)
+            breaker.record_failure(permit)
         except TimeoutError:
             _LOGGER.error("[MyElectrica] Timeout la login")
+            breaker.record_failure(permit)
+        except asyncio.CancelledError:
+            breaker.release(permit)
+            raise
 
-        self._token = None
+        return None
+
+    async def async_login(self) -> bool:
+        """Autentificare și obținere token.  Returnează True la succes."""
+        await self._async_restore_token()
+        token = await self._async_obtain_token()
+        self._set_token(token)
+        await self._async_persist_token()
+        return token is not None
+
+    async def _async_refresh_token(self) -> bool:
+        """
+        Login folosit de calea single-flight.
+
+        Spre deosebire de `async_login`, un eșec nu șterge un token
+        care încă nu a expirat — request-urile în curs îl pot folosi.
+        """
+        token = await self._async_obtain_token()
+        if token is not None:
+            self._set_token(token)
+            await self._async_persist_token()
+            return True
+        if self._token_expired():
+            self._set_token(None)
+            await self._async_persist_token()
         return False
 
-    # ── Request generic (GET) cu retry pe 401 ───
+    # ── Persistența token-ului ──────────────────
 
-    async def async_request(self, url: str) -> dict | list | None:
+    async def _async_restore_token(self) -> None:
         """
-        GET autorizat.  Dacă primim 401 (token expirat),
-        re-autentificăm o dată și reîncercăm.
+        Restaurează (o singură dată) token-ul salvat pentru acest cont.
+
+        Token-ul nu este verificat la restaurare: dacă a fost invalidat
+        între timp, primul request primește 401 și declanșează login-ul.
+        """
+        if self._token_restored or self._token_store is None:
+            return
+        self._token_restored = True
+
+        record = await self._token_store.async_get(self._username)
+        if not record:
+            return
+
+        samples = record.get("lifetime_samples")
+        if isinstance(samples, list) and not self._lifetime_samples:
+            for sample in samples:
+                if (
+                    isinstance(sample, list)
+                    and len(sample) == 2
+                    and all(isinstance(v, (int, float)) for v in sample)
+                ):
+                    self._lifetime_samples.append(
+                        (float(sample[0]), float(sample[1]))
+                    )
+            self._recompute_learned_lifetime()
+
+        token = record.get("token")
+        expires_at = record.get("expires_at")
+        if self._token or not isinstance(token, str) or not token:
+            return
+        if (
+            record.get("expiry_source") == "jwt"
+            and isinstance(expires_at, (int, float))
+            and time.time() >= expires_at
+        ):
+            _LOGGER.debug("[MyElectrica] Token-ul salvat a expirat — îl ignor")
+            return
+
+        self._token = token
+        self._token_issued_at = record.get("issued_at")
+        self._token_expires_at = (
+            float(expires_at) if isinstance(expires_at, (int, float)) else None
+        )
+        self._token_expiry_source = record.get("expiry_source")
+        self._schedule_refresh_timer()
+        _LOGGER.debug("[MyElectrica] Token restaurat din storage")
+
+    def _token_record(self) -> dict[str, Any] | None:
+        """Înregistrarea care se salvează pentru acest cont."""
+        if not self._token and not self._lifetime_samples:
+            return None
+        return {
+            "token": self._token,
+            "issued_at": self._token_issued_at,
+            "expires_at": self._token_expires_at,
+            "expiry_source": self._token_expiry_source,
+            "lifetime_samples": [list(s) for s in self._lifetime_samples],
+        }
+
+    async def _async_persist_token(self) -> None:
+        if self._token_store is not None:
+            await self._token_store.async_set(
+                self._username, self._token_record()
+            )
+
+    # ── Evidența expirării token-ului ───────────
+
+    def _set_token(self, token: str | None) -> None:
+        """Înregistrează token-ul nou și calculează momentul expirării."""
+        self._token = token
+        self._cancel_timer()
+
+        if token is None:
+            self._token_issued_at = None
+            self._token_expires_at = None
+            self._token_expiry_source = None
+            return
+
+        now = time.time()
+        self._token_issued_at = now
+        self._token_expires_at = _jwt_expiry(token)
+        if self._token_expires_at is not None:
+            self._token_expiry_source = "jwt"
+        elif self._learned_lifetime is not None:
+            self._token_expires_at = now + self._learned_lifetime
+            self._token_expiry_source = "învățată"
+        else:
+            self._token_expiry_source = None
+
+        self._schedule_refresh_timer()
+
+    def _learn_lifetime(self) -> None:
+        """
+        La un 401 neanticipat, vârsta token-ului este o observație a
+        duratei lui de viață (posibil mai scurtă, ex. sesiune revocată).
+        """
+        if self._token_issued_at is None or self._token_expiry_source == "jwt":
+            return
+        now = time.time()
+        observed = max(now - self._token_issued_at, TOKEN_MIN_LIFETIME)
+        self._lifetime_samples.append((now, observed))
+        previous = self._learned_lifetime
+        self._recompute_learned_lifetime()
+        _LOGGER.debug(
+            "[MyElectrica] 401 la vârsta %d s — durată învățată: %s → %s",
+            observed,
+            previous,
+            self._learned_lifetime,
+        )
+
+    def _recompute_learned_lifetime(self) -> None:
+        """
+        Durata învățată = cea mai mare dintre ultimele observații recente.
+
+        Scade doar după TOKEN_LIFETIME_CONFIRMATIONS observații mai mici
+        consecutive; crește la prima observație mai mare; dispare când
+        observațiile expiră (TOKEN_LIFETIME_SAMPLE_TTL).
+        """
+        now = time.time()
+        recent = [
+            sample
+            for sample in self._lifetime_samples
+            if now - sample[0] < TOKEN_LIFETIME_SAMPLE_TTL
+        ][-TOKEN_LIFETIME_CONFIRMATIONS:]
+        self._lifetime_samples = recent
+        self._learned_lifetime = (
+            max(age for _, age in recent)
+            if len(recent) >= TOKEN_LIFETIME_CONFIRMATIONS
+            else None
+        )
+
+    def _note_token_alive(self) -> None:
+        """
+        Un request reușit cu un token mai vechi decât durata învățată
+        infirmă estimarea — o renunțăm și revenim la 401 ca semnal.
+        """
+        if (
+            self._learned_lifetime is None
+            or self._token_expiry_source == "jwt"
+            or self._token_issued_at is None
+            or time.time() - self._token_issued_at <= self._learned_lifetime
+        ):
+            return
+        _LOGGER.debug(
+            "[MyElectrica] Token valid după durata învățată (%d s) — resetez",
+            self._learned_lifetime,
+        )
+        self._lifetime_samples = []
+        self._learned_lifetime = None
+        if self._token_expiry_source == "învățată":
+            self._cancel_timer()
+            self._token_expires_at = None
+            self._token_expiry_source = None
+        self._hass.async_create_background_task(
+            self._async_persist_token(), "myelectrica_token_persist"
+        )
+
+    def _refresh_margin(self) -> float:
+        """Cu cât timp înainte de expirare reîmprospătăm token-ul."""
+        if self._token_issued_at is None or self._token_expires_at is None:
+            return TOKEN_REFRESH_MARGIN
+        lifetime = self._token_expires_at - self._token_issued_at
+        return min(TOKEN_REFRESH_MARGIN, max(lifetime, 0) / 5)
+
+    def _token_expired(self) -> bool:
+        """
+        True dacă token-ul lipsește sau a trecut de expirarea din JWT.
+
+        O expirare învățată este doar o estimare: declanșează
+        reîmprospătarea proactivă, dar token-ul rămâne utilizabil până
+        la un 401 (astfel o estimare prea mică poate fi infirmată).
         """
-        # Asigurăm token valid
         if not self._token:
-            if not await self.async_login():
-                _LOGGER.error("[MyElectrica] Nu s-a putut obține token-ul")
-                return None
+            return True
+        return (
+            self._token_expiry_source == "jwt"
+            and self._token_expires_at is not None
+            and time.time() >= self._token_expires_at
+        )
 
-        data = await self._do_get(url)
-        if data is not None:
-            return data
+    def _token_needs_refresh(self) -> bool:
+        """True dacă token-ul intră în fereastra de reîmprospătare."""
+        if self._token_expires_at is None:
+            return False
+        return time.time() >= self._token_expires_at - self._refresh_margin()
+
+    def _schedule_refresh_timer(self) -> None:
+        """Programează reîmprospătarea în fundal înainte de expirare."""
+        if not self._proactive_refresh or self._token_expires_at is None:
+            return
+        delay = max(
+            self._token_expires_at - self._refresh_margin() - time.time(), 0
+        )
+        self._cancel_refresh_timer = async_call_later(
+            self._hass, delay, self._async_handle_refresh_timer
+        )
+
+    def _cancel_timer(self) -> None:
+        if self._cancel_refresh_timer is not None:
+            self._cancel_refresh_timer()
+            self._cancel_refresh_timer = None
+
+    async def _async_handle_refresh_timer(self, _now) -> None:
+        """Callback-ul timer-ului: reîmprospătare token în fundal."""
+        self._cancel_refresh_timer = None
+        _LOGGER.debug("[MyElectrica] Token aproape de expirare — reîmprospătez")
+        self._start_login()
+
+    def _start_login(self) -> asyncio.Task[bool]:
+        """Pornește login-ul comun dacă nu există deja unul în curs."""
+        if self._login_task is None or self._login_task.done():
+            self._login_task = self._hass.async_create_background_task(
+                self._async_refresh_token(), "myelectrica_login"
+            )
+        else:
+            _LOGGER.debug("[MyElectrica] Aștept login-ul deja în curs")
+        return self._login_task
+
+    @property
+    def token_info(self) -> dict[str, Any]:
+        """Starea token-ului pentru diagnostics (fără token-ul propriu-zis)."""
+        now = time.time()
+        return {
+            "are_token": bool(self._token),
+            "varsta_s": (
+                round(now - self._token_issued_at)
+                if self._token_issued_at is not None
+                else None
+            ),
+            "expira_in_s": (
+                round(self._token_expires_at - now)
+                if self._token_expires_at is not None
+                else None
+            ),
+            "sursa_expirare": self._token_expiry_source,
+            "durata_invatata_s": (
+                round(self._learned_lifetime)
+                if self._learned_lifetime is not None
+                else None
+            ),
+        }
+
+    async def async_close(self) -> None:
+        """Oprește timer-ul de reîmprospătare (la descărcarea intrării)."""
+        self._cancel_timer()
+
+    # ── Re-autentificare single-flight ──────────
+
+    async def _async_reauthenticate(self, stale_token: str | None) -> bool:
+        """
+        Obține un token nou, partajând un singur login între apelanți.
+
+        `stale_token` este token-ul cu care apelantul a primit 401 (sau
+        None dacă nu avea token).  Dacă între timp alt request a obținut
+        deja un token diferit, îl folosim direct, fără un login nou.
+        """
+        if self._token and self._token != stale_token:
+            return True
+
+        # shield: anularea unui apelant nu anulează login-ul comun
+        return await asyncio.shield(self._start_login())
+
+    async def async_ensure_token(self) -> bool:
+        """
+        Garantează un token utilizabil înainte de request.
+
+        - token salvat anterior → restaurat, fără login
+        - token lipsă sau expirat → login (blocant, single-flight)
+        - token în fereastra de reîmprospătare → login în fundal,
+          request-ul curent folosește token-ul existent
+        """
+        await self._async_restore_token()
+        if self._token_expired():
+            return await self._async_reauthenticate(self._token)
+        if self._token_needs_refresh():
+            self._start_login()
+        return True
+
+    async def _async_authorized(
+        self, url: str, send: Callable[[], Awaitable[_T]]
+    ) -> _T | None:
+        """
+        Execută `send` cu token valid.  La 401 re-autentificăm
+        (single-flight) și reluăm request-ul o singură dată.
+        """
+        if not await self.async_ensure_token():
+            _LOGGER.error("[MyElectrica] Nu s-a putut obține token-ul")
+            return None
+
+        used_token = self._token
+        try:
+            result = await send()
+            if used_token == self._token:
+                self._note_token_alive()
+            return result
+        except _TokenExpired:
+            if used_token == self._token:
+                self._learn_lifetime()
 
-        # Retry: re-login și a doua încercare
         _LOGGER.debug("[MyElectrica] Retry: re-autentificare pentru %s", url)
-        if await self.async_login():
-            return await self._do_get(url)
+        if not await self._async_reauthenticate(used_token):
+            return None
 
+        try:
+            return await send()
+        except _TokenExpired:
+            _LOGGER.error(
+                "[MyElectrica] Token respins (401) și după re-autentificare: %s",
+                url,
+            )
         return None
 
+    # ── Reîncercări pentru erori tranzitorii ────
+
+    async def _async_with_retry(
+        self,
+        endpoint: str,
+        url: str,
+        send: Callable[[], Awaitable[_T]],
+        idempotent: bool,
+    ) -> _T | None:
+        """
+        Execută `send` conform politicii de reîncercare.
+
+        `_TokenExpired` trece mai departe (tratat de `_async_authorized`).
+        După epuizarea încercărilor returnează None.
+        """
+        breaker = self._breaker(endpoint)
+        permit = breaker.allow()
+        if permit is None:
+            _LOGGER.debug(
+                "[MyElectrica] Circuit deschis pentru %s — %s omis",
+                endpoint,
+                url,
+            )
+            return None
+
+        # În half-open trimitem un singur probe, fără reîncercări
+        max_attempts = 1 if permit.probe else self._retry_policy.max_attempts
+        attempt = 1
+        while True:
+            try:
+                result = await send()
+            except RetryableError as err:
+                if attempt >= max_attempts or not self._retry_policy.should_retry(
+                    attempt, err, idempotent
+                ):
+                    self._count_retry(endpoint, "esecuri_finale")
+                    breaker.record_failure(permit)
+                    _LOGGER.error(
+                        "[MyElectrica] %s — %s (încercarea %s, renunț)",
+                        url,
+                        err.reason,
+                        attempt,
+                    )
+                    return None
+
+                delay = self._retry_policy.delay(attempt, err.retry_after)
+                self._count_retry(endpoint, "reincercari")
+                _LOGGER.warning(
+                    "[MyElectrica] %s — %s; reîncerc în %.1f s (%s/%s)",
+                    url,
+                    err.reason,
+                    delay,
+                    attempt + 1,
+                    max_attempts,
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+            except _TokenExpired:
+                # 401: backend-ul a răspuns — circuitul este sănătos
+                breaker.record_success(permit)
+                raise
+            except BaseException:
+                # Anulare / eroare neprevăzută: nu știm — eliberăm probe-ul
+                # fără a penaliza circuitul
+                breaker.release(permit)
+                raise
+            else:
+                breaker.record_success(permit)
+                return result
+
+    def _breaker(self, family: str) -> CircuitBreaker:
+        """Circuit breaker-ul unei familii de endpoint-uri (creat la nevoie)."""
+        breaker = self._breakers.get(family)
+        if breaker is None:
+            breaker = self._breakers[family] = CircuitBreaker(family)
+        return breaker
+
+    @property
+    def breaker_states(self) -> dict[str, dict[str, Any]]:
+        """Starea circuit breaker-elor (diagnostics)."""
+        return {name: b.info for name, b in sorted(self._breakers.items())}
+
+    def _count_retry(self, endpoint: str, counter: str) -> None:
+        stats = self.retry_stats.setdefault(
+            endpoint, {"reincercari": 0, "esecuri_finale": 0}
+        )
+        stats[counter] += 1
+
+    # ── Request generic (GET) cu retry pe 401 ───
+
+    async def async_request(
+        self,
+        url: str,
+        endpoint: str | None = None,
+        force: bool = False,
+    ) -> dict | list | None:
+        """
+        GET autorizat.  Dacă primim 401 (token expirat),
+        re-autentificăm o dată și reîncercăm.
+
+        Dacă `endpoint` are TTL în `CACHE_TTL`, răspunsul reușit este
+        păstrat în cache; `force=True` ocolește cache-ul (dar îl
+        actualizează cu răspunsul nou).  În modul compact, răspunsul este
+        redus la câmpurile folosite înainte de a fi păstrat și returnat.
+        """
+        ttl = CACHE_TTL.get(endpoint, 0) if endpoint else 0
+        if ttl and not force:
+            cached = self.cache.get(url, endpoint)
+            if cached is not None:
+                _LOGGER.debug("[MyElectrica] Cache hit: %s", url)
+                return cached
+
+        data = await self._async_authorized(
+            url,
+            lambda: self._async_with_retry(
+                endpoint or "altele", url, lambda: self._do_get(url), True
+            ),
+        )
+        if data is not None and self.compact:
+            data = compact_response(endpoint, data)
+        if data is not None and ttl:
+            self.cache.set(url, endpoint, data, ttl)
+        return data
+
     async def _do_get(self, url: str) -> dict | list | None:
-        """Execută un singur GET.  Returnează JSON sau None."""
+        """
+        Execută un singur GET.  Returnează JSON sau None.
+
+        Ridică `_TokenExpired` la 401, pentru re-autentificare, și
+        `RetryableError` la erori tranzitorii (5xx, 429, timeout, erori
+        de conexiune).  Un răspuns 2xx care nu poate fi decodat returnează
+        None, fără reîncercare.
+        """
         headers = {
             "accept": "application/json",
             "authorization": f"Bearer {self._token}",
             "user-agent": HEADERS_POST["User-Agent"],
         }
+        await self._async_throttle()
         try:
             async with self._session.get(
                 url, headers=headers, timeout=REQUEST_TIMEOUT
@@ -139,41 +827,68 @@ class MyElectricaAPI:
                     _LOGGER.warning(
                         "[MyElectrica] Token expirat (401) pentru %s", url
                     )
-                    self._token = None
-                    return None
+                    raise _TokenExpired
+
+                text = await resp.text()
+                if resp.status in RETRYABLE_STATUSES:
+                    raise RetryableError(
+                        f"HTTP {resp.status}",
+                        retry_after=parse_retry_after(
+                            resp.headers.get("Retry-After")
+                        ),
+                        not_processed=resp.status == 429,
+                    )
 
                 _LOGGER.error(
                     "[MyElectrica] GET HTTP %s — URL: %s — răspuns: %s",
                     resp.status,
                     url,
-                    await resp.text(),
+                    text,
                 )
-        except aiohttp.ClientError as err:
-            _LOGGER.error("[MyElectrica] Eroare conexiune: %s — %s", url, err)
-        except TimeoutError:
-            _LOGGER.error("[MyElectrica] Timeout: %s", url)
+        except aiohttp.ClientConnectorError as err:
+            raise RetryableError(f"conexiune: {err}", not_processed=True) from err
+        except aiohttp.ClientConnectionError as err:
+            raise RetryableError(f"eroare conexiune: {err}") from err
+        except TimeoutError as err:
+            raise RetryableError("timeout") from err
+        except (aiohttp.ClientError, ValueError) as err:
+            # Serverul a răspuns, dar corpul nu poate fi decodat (ex.
+            # ContentTypeError) — nu este o eroare tranzitorie
+            _LOGGER.error("[MyElectrica] Răspuns invalid: %s — %s", url, err)
 
         return None
 
     # ── Endpoint-uri specifice ───────────────────
 
     # 3.1 Ierarhie date cont
-    async def async_get_hierarchy(self) -> dict | None:
+    async def async_get_hierarchy(self, force: bool = False) -> dict | None:
         """Ierarhie completă: coduri client → contracte → NLC-uri."""
-        return await self.async_request(URL_HIERARCHY)
+        return await self.async_request(URL_HIERARCHY, "hierarchy", force)
+
+    def seed_hierarchy(self, hierarchy_raw: dict) -> None:
+        """Pune în cache o ierarhie obținută deja (ex. în config flow)."""
+        self.cache.set(
+            URL_HIERARCHY, "hierarchy", hierarchy_raw, CACHE_TTL["hierarchy"]
+        )
 
     # 3.2 Date client detaliate
-    async def async_get_client_data(self, client_code: str) -> dict | None:
+    async def async_get_client_data(
+        self, client_code: str, force: bool = False
+    ) -> dict | None:
         """Date detaliate ale unui client."""
         return await self.async_request(
-            URL_CLIENT_DATA.format(client_code=client_code)
+            URL_CLIENT_DATA.format(client_code=client_code),
+            "client_data",
+            force,
         )
 
     # 3.3 Detalii contract NLC
-    async def async_get_contract_nlc(self, nlc: str) -> dict | None:
+    async def async_get_contract_nlc(
+        self, nlc: str, force: bool = False
+    ) -> dict | None:
         """Detalii contract pentru un NLC."""
         return await self.async_request(
-            URL_CONTRACT_NLC.format(nlc=nlc)
+            URL_CONTRACT_NLC.format(nlc=nlc), "contract_details", force
         )
 
     # 4.1 Facturi per cod client
@@ -181,16 +896,19 @@ class MyElectricaAPI:
         self,
         client_code: str,
         unpaid: bool = False,
+        force: bool = False,
+        start: date | None = None,
     ) -> dict | None:
         """
         Facturi per cod client.
 
-        start_date = acum − 2 ani (calculat dinamic).
+        start_date = acum − 2 ani (implicit) sau `start` (sincronizare
+                     incrementală).
         end_date   = azi.
         unpaid     = True → doar neachitate, False → toate.
         """
         now = datetime.now()
-        start_date = (now - timedelta(days=730)).strftime("%Y-%m-%d")
+        start_date = _format_start(now, start)
         end_date = now.strftime("%Y-%m-%d")
 
         return await self.async_request(
@@ -199,19 +917,27 @@ class MyElectricaAPI:
                 start_date=start_date,
                 end_date=end_date,
                 unpaid=str(unpaid).lower(),
-            )
+            ),
+            "invoices",
+            force,
         )
 
     # 5.1 Istoric plăți
-    async def async_get_payments(self, client_code: str) -> dict | None:
+    async def async_get_payments(
+        self,
+        client_code: str,
+        force: bool = False,
+        start: date | None = None,
+    ) -> dict | None:
         """
         Istoric plăți per cod client.
 
-        start_date = acum − 2 ani (calculat dinamic).
+        start_date = acum − 2 ani (implicit) sau `start` (sincronizare
+                     incrementală).
         end_date   = azi.
         """
         now = datetime.now()
-        start_date = (now - timedelta(days=730)).strftime("%Y-%m-%d")
+        start_date = _format_start(now, start)
         end_date = now.strftime("%Y-%m-%d")
 
         return await self.async_request(
@@ -219,61 +945,70 @@ class MyElectricaAPI:
                 client_code=client_code,
                 start_date=start_date,
                 end_date=end_date,
-            )
+            ),
+            "payments",
+            force,
         )
 
     # 6.1 Lista contoare
-    async def async_get_meter_list(self, nlc: str) -> dict | None:
+    async def async_get_meter_list(
+        self, nlc: str, force: bool = False
+    ) -> dict | None:
         """Lista contoare și cadrane pentru un NLC."""
         return await self.async_request(
-            URL_METER_LIST.format(nlc=nlc)
+            URL_METER_LIST.format(nlc=nlc), "meter_list", force
         )
 
     # 7.1 Istoric citiri
     async def async_get_readings(
-        self, client_code: str, nlc: str
+        self, client_code: str, nlc: str, force: bool = False
     ) -> dict | None:
         """Istoric citiri contor pentru un client și NLC."""
         return await self.async_request(
-            URL_READINGS.format(client_code=client_code, nlc=nlc)
+            URL_READINGS.format(client_code=client_code, nlc=nlc),
+            "readings",
+            force,
         )
 
     # 8.1 Convenție consum
-    async def async_get_convention(self, nlc: str) -> dict | None:
+    async def async_get_convention(
+        self, nlc: str, force: bool = False
+    ) -> dict | None:
         """Convenție de consum pentru un NLC."""
         return await self.async_request(
-            URL_CONVENTION.format(nlc=nlc)
+            URL_CONVENTION.format(nlc=nlc), "convention", force
         )
 
     # ── POST generic cu retry pe 401 ────────────
 
     async def async_post_request(
-        self, url: str, payload: dict
+        self, url: str, payload: dict, endpoint: str = "set_index"
     ) -> dict | None:
-        """POST autorizat cu retry pe 401."""
-        if not self._token:
-            if not await self.async_login():
-                _LOGGER.error("[MyElectrica] Nu s-a putut obține token-ul")
-                return None
-
-        data = await self._do_post(url, payload)
-        if data is not None:
-            return data
-
-        _LOGGER.debug("[MyElectrica] Retry POST: re-autentificare pentru %s", url)
-        if await self.async_login():
-            return await self._do_post(url, payload)
-
-        return None
+        """POST autorizat cu retry pe 401 (neidempotent)."""
+        return await self._async_authorized(
+            url,
+            lambda: self._async_with_retry(
+                endpoint, url, lambda: self._do_post(url, payload), False
+            ),
+        )
 
     async def _do_post(self, url: str, payload: dict) -> dict | None:
-        """Execută un singur POST autorizat.  Returnează JSON sau None."""
+        """
+        Execută un singur POST autorizat.  Returnează JSON sau None.
+
+        Ridică `_TokenExpired` la 401 — request-ul a fost respins
+        înainte de procesare, deci reluarea lui este sigură.  Ridică
+        `RetryableError` doar când serverul sigur nu a procesat
+        request-ul (429, conexiune eșuată); 5xx și timeout-urile NU se
+        reiau, pentru a nu trimite de două ori același index.
+        """
         headers = {
             "accept": "application/json",
             "content-type": "application/json",
             "authorization": f"Bearer {self._token}",
             "user-agent": HEADERS_POST["User-Agent"],
         }
+        await self._async_throttle()
         try:
             async with self._session.post(
                 url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT
@@ -290,8 +1025,17 @@ class MyElectricaAPI:
                     _LOGGER.warning(
                         "[MyElectrica] Token expirat (401) POST %s", url
                     )
-                    self._token = None
-                    return None
+                    raise _TokenExpired
+
+                if resp.status == 429:
+                    # Throttling — request-ul nu a fost procesat
+                    raise RetryableError(
+                        "HTTP 429",
+                        retry_after=parse_retry_after(
+                            resp.headers.get("Retry-After")
+                        ),
+                        not_processed=True,
+                    )
 
                 # Eroare API (4xx/5xx non-401) — returnăm JSON-ul
                 # ca dict, NU None, ca să nu declanșeze retry inutil.
@@ -306,6 +1050,9 @@ class MyElectricaAPI:
                     resp.status, url, error_data,
                 )
                 return error_data
+        except aiohttp.ClientConnectorError as err:
+            # Conexiunea nu s-a stabilit — POST-ul nu a ajuns la server
+            raise RetryableError(f"conexiune: {err}", not_processed=True) from err
         except aiohttp.ClientError as err:
             _LOGGER.error("[MyElectrica] Eroare conexiune POST: %s — %s", url, err)
         except TimeoutError:
@@ -320,9 +1067,23 @@ class MyElectricaAPI:
         serie_contor: str,
         register_code: str,
         index_value: str,
+    ) -> dict | None:
+        """Trimite autocitirea unui singur cadran (vezi async_set_indexes)."""
+        return await self.async_set_indexes(
+            nlc, [(serie_contor, register_code, index_value)]
+        )
+
+    async def async_set_indexes(
+        self,
+        nlc: str,
+        readings: list[tuple[str, str, str]],
     ) -> dict | None:
         """
-        Trimite autocitirea (index) pentru un NLC.
+        Trimite autocitirea (index) pentru mai multe cadrane / contoare
+        ale unui NLC, într-un singur request.
+
+        `readings` conține tupluri (serie_contor, register_code, index);
+        cadranele sunt grupate pe contor, în ordinea primei apariții.
 
         Payload conform API 6.2:
         {
@@ -332,22 +1093,25 @@ class MyElectricaAPI:
                 "to_Cadran": [{
                     "RegisterCode": "...",
                     "Index": "..."
-                }]
-            }]
+                }, ...]
+            }, ...]
         }
         """
+        meters: dict[str, list[dict[str, str]]] = {}
+        for serie_contor, register_code, index_value in readings:
+            meters.setdefault(serie_contor, []).append(
+                {"RegisterCode": register_code, "Index": str(index_value)}
+            )
         payload = {
             "NLC": nlc,
             "to_Contor": [
-                {
-                    "SerieContor": serie_contor,
-                    "to_Cadran": [
-                        {
-                            "RegisterCode": register_code,
-                            "Index": str(index_value),
-                        }
-                    ],
-                }
+                {"SerieContor": serie_contor, "to_Cadran": cadrane}
+                for serie_contor, cadrane in meters.items()
             ],
         }
-        return await self.async_post_request(URL_SET_INDEX, payload)
+        result = await self.async_post_request(URL_SET_INDEX, payload)
+
+        # Indexul nou apare în meter-list / readings — invalidăm cache-ul
+        self.cache.invalidate("meter_list", f"/{nlc}")
+        self.cache.invalidate("readings", f"/{nlc}")
+        return result
@@ -0,0 +1,237 @@
+"""
+Sincronizare incrementală a facturilor și plăților MyElectrica România.
+
+În loc să descărcăm la fiecare refresh fereastra completă de 2 ani,
+păstrăm local istoricul per cod client și cerem doar o fereastră scurtă,
+suprapusă peste ultimele înregistrări cunoscute:
+
+  - facturi: de la (ultima IssueDate − suprapunere), extinsă până la cea
+    mai veche factură încă neachitată (statusul ei se poate schimba)
+  - plăți:   de la (ultima PaymentDate − suprapunere)
+
+Înregistrările din fereastra cerută sunt înlocuite cu răspunsul proaspăt;
+cele păstrate din afara ferestrei sunt deduplicate față de el — facturile
+după InvoiceID / FiscalNumber, plățile după (PaymentDate, PaidValue,
+FiscalNumber / InvoiceID).  O resincronizare completă rulează rar
+(`BILLING_FULL_RESYNC`).
+
+BillingView — facturile și plățile unui cont contract (ContractAccount),
+calculate o singură dată per refresh și citite de senzorii de facturare:
+facturile contului, subsetul neachitat și plățile corelate cu facturile
+contului (join după FiscalNumber / InvoiceID).
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Hashable, Mapping
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
+
+from .const import BILLING_FULL_RESYNC, BILLING_HISTORY_DAYS, BILLING_OVERLAP_DAYS
+from .helper import get_body_response, is_unpaid_invoice
+
+if TYPE_CHECKING:
+    from .index import NlcIndex
+    from .models import Invoice, Payment
+
+# Câmpul de dată folosit pentru fiecare tip de istoric
+DATE_FIELDS: dict[str, str] = {
+    "invoices": "IssueDate",
+    "payments": "PaymentDate",
+}
+
+
+@dataclass(slots=True)
+class BillingHistory:
+    """Istoricul local al unui cod client pentru facturi sau plăți."""
+
+    kind: str
+    records: list[dict] = field(default_factory=list)
+    full_sync_at: float = 0.0
+
+    @property
+    def date_field(self) -> str:
+        return DATE_FIELDS[self.kind]
+
+    def needs_full_sync(self) -> bool:
+        """True la prima sincronizare sau când a trecut intervalul lung."""
+        return (
+            not self.full_sync_at
+            or time.time() - self.full_sync_at >= BILLING_FULL_RESYNC
+        )
+
+    def window_start(self, today: date) -> date:
+        """Începutul ferestrei pentru o sincronizare de rutină."""
+        floor = today - timedelta(days=BILLING_HISTORY_DAYS)
+        dates = [d for d in map(self._record_date, self.records) if d]
+        if not dates:
+            return floor
+
+        start = max(dates) - timedelta(days=BILLING_OVERLAP_DAYS)
+
+        # Facturile neachitate își pot schimba statusul — le recerem
+        if self.kind == "invoices":
+            for record in self.records:
+                record_date = self._record_date(record)
+                if record_date and is_unpaid_invoice(record):
+                    start = min(start, record_date)
+
+        return max(start, floor)
+
+    def merge(self, fresh: list[dict], window_start: date, today: date) -> None:
+        """
+        Înlocuiește înregistrările din fereastră cu răspunsul proaspăt.
+
+        Înregistrările fără dată validă sunt păstrate (nu pot fi plasate
+        în fereastră), cu excepția celor fără cheie de deduplicare.
+        Rezultatul este sortat cronologic (crescător), ca răspunsul API.
+        """
+        floor = today - timedelta(days=BILLING_HISTORY_DAYS)
+        fresh_keys = {
+            key for key in map(self._record_key, fresh) if key is not None
+        }
+
+        kept: list[dict] = []
+        for record in self.records:
+            key = self._record_key(record)
+            if key is not None and key in fresh_keys:
+                continue
+            record_date = self._record_date(record)
+            if record_date is None:
+                # Fără cheie nu o putem deosebi de o copie din răspuns
+                if key is not None:
+                    kept.append(record)
+                continue
+            if record_date >= window_start or record_date < floor:
+                continue
+            kept.append(record)
+
+        self.records = sorted(
+            kept + list(fresh),
+            key=lambda r: r.get(self.date_field) or "",
+        )
+
+    def replace(self, fresh: list[dict]) -> None:
+        """Resincronizare completă — istoricul devine răspunsul API."""
+        self.records = list(fresh)
+        self.full_sync_at = time.time()
+
+    def _record_date(self, record: dict) -> date | None:
+        try:
+            return date.fromisoformat(record.get(self.date_field) or "")
+        except (TypeError, ValueError):
+            return None
+
+    def _record_key(self, record: dict) -> Hashable | None:
+        """
+        Cheia de deduplicare: factura după InvoiceID / FiscalNumber, plata
+        după data, suma și documentul achitat (plățile nu au ID propriu).
+        """
+        if self.kind == "invoices":
+            return record.get("InvoiceID") or record.get("FiscalNumber") or None
+        return (
+            record.get("PaymentDate") or "",
+            str(record.get("PaidValue") or ""),
+            record.get("FiscalNumber") or record.get("InvoiceID") or "",
+        )
+
+
+def extract_records(raw: dict | list | None) -> list[dict] | None:
+    """Lista de înregistrări din răspunsul API (None dacă lipsește)."""
+    response = get_body_response(raw)
+    return response if isinstance(response, list) else None
+
+
+def with_records(raw: dict | list, records: list[dict]) -> dict | list:
+    """Reconstruiește plicul răspunsului API cu lista de înregistrări dată."""
+    if isinstance(raw, list):
+        return records
+    body = raw.get("body")
+    body = dict(body) if isinstance(body, dict) else {}
+    body["response"] = records
+    return {**raw, "body": body}
+
+
+# ── Vederi per cont contract ────────────────────
+
+# Cheia unei vederi: (cod client, cont contract)
+type BillingViewKey = tuple[str, str]
+
+
+@dataclass(frozen=True, slots=True)
+class BillingView:
+    """Facturile și plățile unui cont contract, precalculate per refresh."""
+
+    # Facturile contului, în ordinea API
+    invoices: tuple[Invoice, ...] = ()
+    # Subsetul neachitat, în aceeași ordine
+    unpaid: tuple[Invoice, ...] = ()
+    # Plățile corelate cu facturile contului, în ordinea API
+    payments: tuple[Payment, ...] = ()
+    # Cheie factură (FiscalNumber / InvoiceID) → plățile ei
+    payments_by_invoice: Mapping[str, tuple[Payment, ...]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+
+
+EMPTY_BILLING_VIEW = BillingView()
+
+
+def build_billing_views(
+    invoices_by_client: Mapping[str, tuple[Invoice, ...]],
+    payments_by_client: Mapping[str, tuple[Payment, ...]],
+    index: NlcIndex,
+) -> dict[BillingViewKey, BillingView]:
+    """
+    Construiește vederile pentru toate conturile contract din index.
+
+    O singură trecere prin facturile și plățile (normalizate) ale fiecărui
+    cod client.  Un NLC fără ContractAccount (cont gol) vede toate
+    facturile clientului.
+    """
+    views: dict[BillingViewKey, BillingView] = {}
+
+    for cc in index.client_codes:
+        accounts = {
+            index.nlc_contract.get(nlc, "") for nlc in index.client_nlcs[cc]
+        }
+        invoices: dict[str, list[Invoice]] = {ca: [] for ca in accounts}
+        payments: dict[str, list[Payment]] = {ca: [] for ca in accounts}
+        by_invoice: dict[str, dict[str, list[Payment]]] = {
+            ca: {} for ca in accounts
+        }
+        # Cheie factură → conturile care o conțin
+        key_accounts: dict[str, set[str]] = {}
+
+        for invoice in invoices_by_client.get(cc) or ():
+            targets = {invoice.contract_account, ""} & accounts
+            for ca in targets:
+                invoices[ca].append(invoice)
+            for key in invoice.keys:
+                key_accounts.setdefault(key, set()).update(targets)
+
+        for payment in payments_by_client.get(cc) or ():
+            keys = payment.keys
+            targets: set[str] = set()
+            for key in keys:
+                targets.update(key_accounts.get(key, ()))
+            for ca in targets:
+                payments[ca].append(payment)
+                for key in keys:
+                    if ca in key_accounts.get(key, ()):
+                        by_invoice[ca].setdefault(key, []).append(payment)
+
+        for ca in accounts:
+            views[(cc, ca)] = BillingView(
+                invoices=tuple(invoices[ca]),
+                unpaid=tuple(i for i in invoices[ca] if i.unpaid),
+                payments=tuple(payments[ca]),
+                payments_by_invoice=MappingProxyType(
+                    {key: tuple(p) for key, p in by_invoice[ca].items()}
+                ),
+            )
+
+    return views
@@ -2,24 +2,43 @@
 Platforma Button pentru MyElectrica România.
 
 Creează un buton per NLC pentru trimiterea autocitiri (set-index).
-Citește valoarea indexului din:
-  - input_number.energy_meter_reading  (dacă produsul este Electricitate)
-  - input_number.gas_meter_reading     (dacă produsul este Gaz)
+Toate cadranele tuturor contoarelor NLC-ului pleacă într-un singur
+request.  Indexul fiecărui cadran este citit din (primul existent):
+  - input_number.myelectrica_{nlc}_{serie}_{registru}
+  - input_number.myelectrica_{nlc}_{registru}
+  - doar pentru primul cadran, input_number-ul implicit al produsului:
+      input_number.energy_meter_reading  (dacă produsul este Electricitate)
+      input_number.gas_meter_reading     (dacă produsul este Gaz)
 """
 
 import logging
 
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-
-from .const import ATTRIBUTION, DOMAIN, LICENSE_DATA_KEY
-from .coordinator import MyElectricaCoordinator
-from .helper import build_address, get_body_response
-from .sensor import NlcContext
+from homeassistant.helpers.event import (
+    async_track_state_added_domain,
+    async_track_state_removed_domain,
+)
+from homeassistant.util import slugify
+
+from .const import (
+    ATTRIBUTION,
+    DOMAIN,
+    LICENSE_DATA_KEY,
+    SIGNAL_HIERARCHY_CHANGED,
+)
+from .coordinator import (
+    ChangeAwareEntity,
+    HierarchyChange,
+    MyElectricaCoordinator,
+)
+from .helper import get_body_response
+from .sensor import NlcContext, build_nlc_contexts
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -38,7 +57,11 @@ async def async_setup_entry(
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Configurează butoanele de trimitere index pe baza ierarhiei."""
+    """Configurează butoanele de trimitere index pe baza ierarhiei.
+
+    NLC-urile apărute / dispărute ulterior (SIGNAL_HIERARCHY_CHANGED)
+    primesc / pierd butonul fără reîncărcarea intrării.
+    """
     # Verifică dacă licența este validă
     mgr = hass.data.get(DOMAIN, {}).get(LICENSE_DATA_KEY)
     if mgr is None or not mgr.is_valid:
@@ -51,56 +74,56 @@ async def async_setup_entry(
         _LOGGER.warning("[MyElectrica] Coordinator fără date la setup buttons")
         return
 
-    hierarchy = coordinator.data.get("hierarchy", [])
-    selected_nlcs = config_entry.data.get("selected_nlcs")
-    buttons: list[ButtonEntity] = []
-
-    for client in hierarchy:
-        client_code = client.get("ClientCode", "")
-        client_name = client.get("ClientName", "")
-
-        for contract in client.get("to_ContContract", []):
-            contract_account = contract.get("ContractAccount", "")
-
-            for loc in contract.get("to_LocConsum", []):
-                nlc = loc.get("IdLocConsum", "")
-                if not nlc:
-                    continue
-
-                if selected_nlcs and nlc not in selected_nlcs:
-                    continue
-
-                address = build_address(loc)
-
-                ctx = NlcContext(
-                    nlc=nlc,
-                    client_code=client_code,
-                    client_name=client_name,
-                    contract_account=contract_account,
-                    address=address,
-                )
-
-                buttons.append(
-                    TrimiteIndexButton(coordinator, config_entry, ctx)
-                )
-
-    _LOGGER.debug(
-        "[MyElectrica] Se adaugă %s butoane (entry_id=%s)",
-        len(buttons),
-        config_entry.entry_id,
+    # Butoanele create, per NLC
+    known: dict[str, TrimiteIndexButton] = {}
+
+    @callback
+    def _async_sync_entities(change: HierarchyChange | None = None) -> None:
+        """Aduce butoanele la zi cu NLC-urile din ierarhia curentă."""
+        contexts = build_nlc_contexts(coordinator.index)
+
+        buttons: list[ButtonEntity] = []
+        for nlc, ctx in contexts.items():
+            if nlc not in known:
+                known[nlc] = TrimiteIndexButton(coordinator, config_entry, ctx)
+                buttons.append(known[nlc])
+
+        removed = [nlc for nlc in known if nlc not in contexts]
+        registru = er.async_get(hass)
+        for nlc in removed:
+            button = known.pop(nlc)
+            entity_id = registru.async_get_entity_id(
+                "button", DOMAIN, button.unique_id
+            )
+            if entity_id is not None:
+                registru.async_remove(entity_id)
+
+        _LOGGER.debug(
+            "[MyElectrica] Se adaugă %s butoane, se elimină %s (entry_id=%s)",
+            len(buttons),
+            len(removed),
+            config_entry.entry_id,
+        )
+        if buttons:
+            async_add_entities(buttons)
+
+    _async_sync_entities()
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_HIERARCHY_CHANGED.format(entry_id=config_entry.entry_id),
+            _async_sync_entities,
+        )
     )
 
-    async_add_entities(buttons)
-
 
-class TrimiteIndexButton(
-    CoordinatorEntity[MyElectricaCoordinator], ButtonEntity
-):
+class TrimiteIndexButton(ChangeAwareEntity, ButtonEntity):
     """Buton pentru trimiterea autocitiri (set-index) per NLC."""
 
     _attr_has_entity_name = False
     _attr_icon = "mdi:send"
     _attr_translation_key = "trimite_index"
+    _inputs = (("meter_list", "nlc"), ("contract_details", "nlc"))
 
     def __init__(
         self,
@@ -115,6 +138,32 @@ class TrimiteIndexButton(
         self._attr_unique_id = f"{DOMAIN}_{ctx.nlc}_trimite_index"
         self._custom_entity_id = f"button.{DOMAIN}_{ctx.nlc}_trimite_index"
 
+    async def async_added_to_hass(self) -> None:
+        """Urmărește apariția / dispariția helper-elor input_number."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_state_added_domain(
+                self.hass, "input_number", self._async_input_changed
+            )
+        )
+        self.async_on_remove(
+            async_track_state_removed_domain(
+                self.hass, "input_number", self._async_input_changed
+            )
+        )
+
+    @callback
+    def _async_input_changed(self, event: Event) -> None:
+        """Un input_number a fost creat / șters — sursele se pot schimba."""
+        self._handle_coordinator_update()
+
+    def _input_signature(self) -> tuple:
+        """Intrările din coordinator + sursele de index găsite."""
+        return (
+            *super()._input_signature(),
+            tuple(entity_id for _, _, entity_id in self._get_index_sources()),
+        )
+
     @property
     def entity_id(self) -> str | None:
         """Returnează ID-ul entității."""
@@ -136,37 +185,33 @@ class TrimiteIndexButton(
             entry_type=DeviceEntryType.SERVICE,
         )
 
-    def _get_meter_info(self) -> tuple[str, str, str]:
+    def _get_registers(self) -> list[tuple[str, str]]:
         """
-        Extrage din meter_list: SerieContor, RegisterCode, ProductName.
+        Toate cadranele NLC-ului, din meter_list (normalizat).
 
-        Returnează (serie_contor, register_code, product_name) sau
-        ("", "", "") dacă datele lipsesc.
+        Returnează perechi (serie_contor, register_code), contor după
+        contor, în ordinea API.
         """
         if not self.coordinator.data:
-            return "", "", ""
-
-        # Serie contor și register code din meter_list
-        meter_bucket = self.coordinator.data.get("meter_list", {})
-        meter_raw = meter_bucket.get(self._ctx.nlc)
-        meter_resp = get_body_response(meter_raw)
-
-        serie_contor = ""
-        register_code = ""
-
-        if meter_resp:
-            contoare = meter_resp.get("to_Contor", [])
-            if contoare:
-                contor = contoare[0]
-                serie_contor = contor.get("SerieContor", "")
-                cadrane = contor.get("to_Cadran", [])
-                if cadrane:
-                    register_code = cadrane[0].get("RegisterCode", "")
-
-        # Product name din contract_details
+            return []
+        records = self.coordinator.data.get("records") or {}
+        meter_list = (records.get("meter_list") or {}).get(self._ctx.nlc)
+        if meter_list is None:
+            return []
+        return [
+            (meter.serie_contor, register.register_code)
+            for meter in meter_list.meters
+            for register in meter.registers
+            if meter.serie_contor and register.register_code
+        ]
+
+    def _get_product_name(self) -> str:
+        """ProductName din contract_details (sau ServiceType din ierarhie)."""
+        if not self.coordinator.data:
+            return ""
+
         contract_bucket = self.coordinator.data.get("contract_details", {})
-        contract_raw = contract_bucket.get(self._ctx.nlc)
-        contract_resp = get_body_response(contract_raw)
+        contract_resp = get_body_response(contract_bucket.get(self._ctx.nlc))
 
         product_name = ""
         if contract_resp:
@@ -174,101 +219,178 @@ class TrimiteIndexButton(
 
         # Fallback: dacă ProductName e gol, caută ServiceType din ierarhie
         if not product_name:
-            hierarchy = self.coordinator.data.get("hierarchy", [])
-            for client in hierarchy:
-                for contract in client.get("to_ContContract", []):
-                    for loc in contract.get("to_LocConsum", []):
-                        if loc.get("IdLocConsum") == self._ctx.nlc:
-                            product_name = loc.get("ServiceType", "")
-                            break
+            loc = self.coordinator.index.loc(self._ctx.nlc)
+            if loc:
+                product_name = loc.get("ServiceType", "")
 
-        return serie_contor, register_code, product_name
+        return product_name
 
     def _get_input_number_entity_id(self, product_name: str) -> str | None:
         """Determină entity_id-ul input_number pe baza tipului de produs."""
         key = product_name.strip().lower()
         return _INPUT_NUMBER_MAP.get(key)
 
+    def _input_candidates(
+        self, serie_contor: str, register_code: str, first: bool
+    ) -> list[str]:
+        """
+        Sursele posibile ale indexului unui cadran, în ordinea preferinței.
+
+        Per cadran: input_number.myelectrica_{nlc}_{serie}_{registru}, apoi
+        input_number.myelectrica_{nlc}_{registru}; primul cadran poate
+        folosi și input_number-ul implicit al produsului.
+        """
+        prefix = f"input_number.{DOMAIN}_{slugify(self._ctx.nlc)}"
+        candidates = [
+            f"{prefix}_{slugify(serie_contor)}_{slugify(register_code)}",
+            f"{prefix}_{slugify(register_code)}",
+        ]
+        if first:
+            default = self._get_input_number_entity_id(
+                self._get_product_name()
+            )
+            if default:
+                candidates.append(default)
+        return candidates
+
+    def _get_index_sources(self) -> list[tuple[str, str, str | None]]:
+        """
+        Sursa indexului pentru fiecare cadran.
+
+        Returnează tupluri (serie_contor, register_code, entity_id);
+        entity_id este None dacă niciun input_number candidat nu există.
+        """
+        sources: list[tuple[str, str, str | None]] = []
+        for position, (serie, register_code) in enumerate(
+            self._get_registers()
+        ):
+            entity_id = next(
+                (
+                    candidate
+                    for candidate in self._input_candidates(
+                        serie, register_code, position == 0
+                    )
+                    if self.hass.states.get(candidate) is not None
+                ),
+                None,
+            )
+            sources.append((serie, register_code, entity_id))
+        return sources
+
+    def _expected_input(
+        self, serie_contor: str, register_code: str, first: bool
+    ) -> str:
+        """Entity_id-ul sugerat pentru un cadran fără sursă de index."""
+        return self._input_candidates(serie_contor, register_code, first)[-1]
+
     @property
     def extra_state_attributes(self):
-        """Afișează informații utile despre contor și sursa indexului."""
-        serie, register, product = self._get_meter_info()
-        input_entity = self._get_input_number_entity_id(product) or "Neconfigurat"
+        """Afișează informații utile despre contoare și sursele indexului."""
+        sources = self._get_index_sources()
+        product = self._get_product_name()
+        if sources:
+            serie, register, input_entity = sources[0]
+            input_entity = input_entity or self._expected_input(
+                serie, register, True
+            )
+        else:
+            serie, register = "", ""
+            input_entity = (
+                self._get_input_number_entity_id(product) or "Neconfigurat"
+            )
 
-        return {
+        attrs = {
             "NLC": self._ctx.nlc,
             "Serie contor": serie or "Necunoscut",
             "Cod registru": register or "Necunoscut",
             "Produs": product or "Necunoscut",
             "Sursă index": input_entity,
-            "attribution": ATTRIBUTION,
         }
+        if len(sources) > 1:
+            attrs["Surse index"] = {
+                f"{serie} / {register}": entity_id
+                or self._expected_input(serie, register, position == 0)
+                for position, (serie, register, entity_id) in enumerate(sources)
+            }
+        attrs.update(self._stale_attributes())
+        attrs["attribution"] = ATTRIBUTION
+        return attrs
 
     async def async_press(self) -> None:
-        """Trimite indexul citit din input_number către API."""
-        serie_contor, register_code, product_name = self._get_meter_info()
+        """
+        Trimite indexurile citite din input_number către API.
 
-        if not serie_contor or not register_code:
+        Toate cadranele (toate contoarele NLC-ului) pleacă într-un singur
+        request.  Dacă vreun cadran nu are sursă de index, nu se trimite
+        nimic — o autocitire parțială ar fi acceptată ca și completă.
+        """
+        sources = self._get_index_sources()
+        if not sources:
             _LOGGER.error(
-                "[MyElectrica] Nu se pot determina datele contorului "
-                "pentru NLC %s (serie=%s, register=%s)",
+                "[MyElectrica] Nu se pot determina contoarele / cadranele "
+                "pentru NLC %s",
                 self._ctx.nlc,
-                serie_contor,
-                register_code,
             )
             return
 
-        # Determinăm entity_id-ul input_number
-        input_entity_id = self._get_input_number_entity_id(product_name)
-        if not input_entity_id:
+        missing = [
+            self._input_candidates(serie, register_code, False)[0]
+            for serie, register_code, entity_id in sources
+            if entity_id is None
+        ]
+        if missing:
             _LOGGER.error(
-                "[MyElectrica] Nu se poate determina input_number pentru "
-                "produsul '%s' (NLC: %s). Produse suportate: "
-                "Electricitate → input_number.energy_meter_reading, "
-                "Gaz → input_number.gas_meter_reading",
-                product_name,
+                "[MyElectrica] Index netrimis pentru NLC %s — lipsesc "
+                "input_number-ele pentru %s din %s cadrane: %s "
+                "(pentru primul cadran este acceptat și input_number-ul "
+                "implicit al produsului: energy_meter_reading / "
+                "gas_meter_reading)",
                 self._ctx.nlc,
+                len(missing),
+                len(sources),
+                ", ".join(missing),
             )
             return
 
-        # Citim valoarea din input_number
-        state = self.hass.states.get(input_entity_id)
-        if state is None or state.state in ("unknown", "unavailable"):
-            _LOGGER.error(
-                "[MyElectrica] Entitatea %s nu există sau nu are valoare "
-                "(NLC: %s)",
-                input_entity_id,
-                self._ctx.nlc,
-            )
-            return
+        readings: list[tuple[str, str, str]] = []
+        for serie_contor, register_code, input_entity_id in sources:
+            # Citim valoarea din input_number
+            state = self.hass.states.get(input_entity_id)
+            if state is None or state.state in ("unknown", "unavailable"):
+                _LOGGER.error(
+                    "[MyElectrica] Entitatea %s nu există sau nu are valoare "
+                    "(NLC: %s)",
+                    input_entity_id,
+                    self._ctx.nlc,
+                )
+                return
 
-        try:
-            index_value = str(int(float(state.state)))
-        except (ValueError, TypeError):
-            _LOGGER.error(
-                "[MyElectrica] Valoare invalidă în %s: '%s' (NLC: %s)",
-                input_entity_id,
-                state.state,
+            try:
+                index_value = str(int(float(state.state)))
+            except (ValueError, TypeError):
+                _LOGGER.error(
+                    "[MyElectrica] Valoare invalidă în %s: '%s' (NLC: %s)",
+                    input_entity_id,
+                    state.state,
+                    self._ctx.nlc,
+                )
+                return
+
+            _LOGGER.info(
+                "[MyElectrica] Trimitere index: NLC=%s, contor=%s, "
+                "registru=%s, index=%s (sursă: %s)",
                 self._ctx.nlc,
+                serie_contor,
+                register_code,
+                index_value,
+                input_entity_id,
             )
-            return
-
-        _LOGGER.info(
-            "[MyElectrica] Trimitere index: NLC=%s, contor=%s, "
-            "registru=%s, index=%s (sursă: %s)",
-            self._ctx.nlc,
-            serie_contor,
-            register_code,
-            index_value,
-            input_entity_id,
-        )
+            readings.append((serie_contor, register_code, index_value))
 
-        # Apelăm API-ul
-        result = await self.coordinator.api.async_set_index(
+        # Apelăm API-ul — un singur request pentru toate cadranele
+        result = await self.coordinator.api.async_set_indexes(
             nlc=self._ctx.nlc,
-            serie_contor=serie_contor,
-            register_code=register_code,
-            index_value=index_value,
+            readings=readings,
         )
 
         if result:
@@ -299,13 +421,14 @@ class TrimiteIndexButton(
             else:
                 _LOGGER.info(
                     "[MyElectrica] Index trimis cu succes pentru NLC %s "
-                    "(index=%s)",
+                    "(%s cadrane)",
                     self._ctx.nlc,
-                    index_value,
+                    len(readings),
                 )
 
-                # Forțăm refresh date după trimitere
-                await self.coordinator.async_request_refresh()
+                # Refresh țintit (fără cache): doar contoarele și citirile
+                # acestui NLC, nu un ciclu complet pentru tot contul
+                await self.coordinator.async_refresh_nlc(self._ctx.nlc)
         else:
             _LOGGER.error(
                 "[MyElectrica] Trimitere index eșuată pentru NLC %s — "
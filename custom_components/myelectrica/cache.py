@@ -0,0 +1,83 @@
+"""
+Cache de răspunsuri pentru API-ul MyElectrica România.
+
+Răspunsurile GET reușite sunt păstrate în memorie, indexate după URL,
+cu TTL per endpoint (vezi `CACHE_TTL` din const.py) și evicție LRU.
+Un refresh de rutină atinge doar endpoint-urile al căror TTL a expirat.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any
+
+from .const import CACHE_MAX_ENTRIES
+
+
+class ResponseCache:
+    """Cache LRU cu TTL per intrare și contoare hit/miss per endpoint."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES) -> None:
+        self._max_entries = max_entries
+        # url → (endpoint, expiră_la (monotonic), răspuns)
+        self._entries: OrderedDict[str, tuple[str, float, Any]] = OrderedDict()
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+        self._evictions = 0
+
+    def get(self, url: str, endpoint: str) -> Any | None:
+        """Returnează răspunsul din cache dacă există și nu a expirat."""
+        entry = self._entries.get(url)
+        if entry is not None:
+            if time.monotonic() < entry[1]:
+                self._entries.move_to_end(url)
+                self._hits[endpoint] = self._hits.get(endpoint, 0) + 1
+                return entry[2]
+            del self._entries[url]
+        self._misses[endpoint] = self._misses.get(endpoint, 0) + 1
+        return None
+
+    def set(self, url: str, endpoint: str, value: Any, ttl: float) -> None:
+        """Salvează un răspuns pentru `ttl` secunde."""
+        if ttl <= 0:
+            return
+        self._entries[url] = (endpoint, time.monotonic() + ttl, value)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, endpoint: str, contains: str | None = None) -> int:
+        """
+        Elimină intrările unui endpoint (opțional doar cele al căror URL
+        conține `contains`).  Returnează numărul de intrări eliminate.
+        """
+        stale = [
+            url
+            for url, (ep, _, _) in self._entries.items()
+            if ep == endpoint and (contains is None or contains in url)
+        ]
+        for url in stale:
+            del self._entries[url]
+        return len(stale)
+
+    def values(self) -> list[Any]:
+        """Răspunsurile păstrate (pentru măsurarea memoriei)."""
+        return [value for _, _, value in self._entries.values()]
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Statistici pentru diagnostics."""
+        endpoints = sorted(set(self._hits) | set(self._misses))
+        return {
+            "intrari": len(self._entries),
+            "evictii": self._evictions,
+            "per_endpoint": {
+                ep: {
+                    "hit": self._hits.get(ep, 0),
+                    "miss": self._misses.get(ep, 0),
+                }
+                for ep in endpoints
+            },
+        }
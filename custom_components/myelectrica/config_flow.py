@@ -28,12 +28,35 @@ from homeassistant.helpers.selector import (
     SelectSelectorMode,
 )
 
-from .api import MyElectricaAPI
-from .const import CONF_LICENSE_KEY, DEFAULT_UPDATE, DOMAIN, LICENSE_DATA_KEY, LICENSE_PURCHASE_URL
+from .api import (
+    MyElectricaAPI,
+    async_get_rate_limiter,
+    async_store_handoff,
+)
+from .const import (
+    CONF_LICENSE_KEY,
+    DEFAULT_COMPACT_RETENTION,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_UPDATE,
+    DOMAIN,
+    LICENSE_DATA_KEY,
+    LICENSE_PURCHASE_URL,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_PER_SECOND,
+)
 from .helper import normalize_title
+from .storage import async_get_token_store
 
 _LOGGER = logging.getLogger(__name__)
 
+# Setările avansate din options flow (păstrate în entry.data)
+_ADVANCED_KEYS = (
+    "max_concurrency",
+    "rate_limit",
+    "rate_burst",
+    "compact_retention",
+)
+
 
 # ------------------------------------------------------------------
 # Helpers
@@ -154,10 +177,13 @@ class MyElectricaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             await self.async_set_unique_id(self._username.lower())
             self._abort_if_unique_id_configured()
 
+            # Token-ul obținut aici este salvat și refolosit la setup
             api = MyElectricaAPI(
                 self.hass,
                 username=self._username,
                 password=self._password,
+                token_store=async_get_token_store(self.hass),
+                rate_limiter=async_get_rate_limiter(self.hass),
             )
 
             if await api.async_login():
@@ -165,6 +191,9 @@ class MyElectricaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
                 if hierarchy_raw and hierarchy_raw.get("details"):
                     self._hierarchy = hierarchy_raw["details"]
+                    async_store_handoff(
+                        self.hass, self._username, hierarchy_raw
+                    )
                     return await self.async_step_select_nlc()
 
                 errors["base"] = "no_data"
@@ -253,6 +282,8 @@ class MyElectricaOptionsFlow(config_entries.OptionsFlow):
         self._username: str = ""
         self._password: str = ""
         self._update_interval: int = DEFAULT_UPDATE
+        # Setări avansate (concurență, rate limit, retenție compactă)
+        self._advanced: dict[str, Any] = {}
         self._hierarchy: list[dict] = []
 
     # ─────────────────────────────────────────
@@ -287,17 +318,39 @@ class MyElectricaOptionsFlow(config_entries.OptionsFlow):
             )
 
             api = MyElectricaAPI(
-                self.hass, username=username, password=password
+                self.hass,
+                username=username,
+                password=password,
+                token_store=async_get_token_store(self.hass),
+                rate_limiter=async_get_rate_limiter(self.hass),
             )
 
-            if await api.async_login():
+            # Credențiale neschimbate → refolosim token-ul salvat;
+            # altfel le validăm printr-un login explicit
+            current = self.config_entry.data
+            credentials_unchanged = (
+                username == current.get("username")
+                and password == current.get("password")
+            )
+            if credentials_unchanged:
+                authenticated = await api.async_ensure_token()
+            else:
+                authenticated = await api.async_login()
+
+            if authenticated:
                 hierarchy_raw = await api.async_get_hierarchy()
 
                 if hierarchy_raw and hierarchy_raw.get("details"):
                     self._hierarchy = hierarchy_raw["details"]
+                    async_store_handoff(self.hass, username, hierarchy_raw)
                     self._username = username
                     self._password = password
                     self._update_interval = update_interval
+                    self._advanced = {
+                        key: user_input[key]
+                        for key in _ADVANCED_KEYS
+                        if key in user_input
+                    }
                     return await self.async_step_select_nlc()
 
                 errors["base"] = "no_data"
@@ -320,6 +373,26 @@ class MyElectricaOptionsFlow(config_entries.OptionsFlow):
                         "update_interval", DEFAULT_UPDATE
                     ),
                 ): int,
+                vol.Required(
+                    "max_concurrency",
+                    default=current.get(
+                        "max_concurrency", DEFAULT_MAX_CONCURRENCY
+                    ),
+                ): vol.All(int, vol.Range(min=1, max=20)),
+                vol.Required(
+                    "rate_limit",
+                    default=current.get("rate_limit", RATE_LIMIT_PER_SECOND),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=20)),
+                vol.Required(
+                    "rate_burst",
+                    default=current.get("rate_burst", RATE_LIMIT_BURST),
+                ): vol.All(int, vol.Range(min=1, max=100)),
+                vol.Required(
+                    "compact_retention",
+                    default=current.get(
+                        "compact_retention", DEFAULT_COMPACT_RETENTION
+                    ),
+                ): bool,
             }
         )
 
@@ -344,17 +417,49 @@ class MyElectricaOptionsFlow(config_entries.OptionsFlow):
                     select_all, selected, self._hierarchy
                 )
 
+                previous = self.config_entry.data
+                # Credențialele și retenția compactă țin de clientul API
+                # (token, cache) — schimbarea lor cere reîncărcare
+                needs_reload = (
+                    self._username != previous.get("username")
+                    or self._password != previous.get("password")
+                    or self._advanced.get(
+                        "compact_retention", DEFAULT_COMPACT_RETENTION
+                    )
+                    != previous.get(
+                        "compact_retention", DEFAULT_COMPACT_RETENTION
+                    )
+                )
+
                 self.hass.config_entries.async_update_entry(
                     self.config_entry,
                     data={
+                        **previous,
                         "username": self._username,
                         "password": self._password,
                         "update_interval": self._update_interval,
                         "select_all": select_all,
                         "selected_nlcs": final_selection,
+                        **self._advanced,
                     },
                 )
 
+                # Interval / selecție NLC / limite → aplicate pe loc de
+                # coordinator; restul cer un client API nou (reîncărcare)
+                coordinator = getattr(self.config_entry, "runtime_data", None)
+                if not needs_reload and coordinator is not None:
+                    try:
+                        await coordinator.async_apply_options(
+                            self._update_interval, final_selection
+                        )
+                        return self.async_create_entry(data={})
+                    except Exception as err:  # noqa: BLE001
+                        _LOGGER.warning(
+                            "[MyElectrica] Reconfigurarea live a eșuat (%s) "
+                            "— reîncarc intrarea",
+                            err,
+                        )
+
                 await self.hass.config_entries.async_reload(
                     self.config_entry.entry_id
                 )
@@ -9,6 +9,43 @@ DOMAIN = "myelectrica"
 DEFAULT_UPDATE = 3600  # secunde (1 oră)
 ATTRIBUTION = "Date furnizate de MyElectrica România"
 
+# Număr maxim de request-uri simultane per cont (semafor în coordinator)
+DEFAULT_MAX_CONCURRENCY = 6
+
+# Domenii de date cu program propriu de actualizare.
+# Valoarea = intervalul minim (secunde); intervalul efectiv este
+# max(update_interval, minim).  0 = urmează update_interval.
+REFRESH_DOMAINS: dict[str, int] = {
+    "structure": 12 * 3600,   # ierarhie, date client, detalii contract
+    "billing": 3 * 3600,      # facturi, plăți
+    "metering": 0,            # contoare, istoric citiri
+    "convention": 24 * 3600,  # convenție consum
+}
+
+# Eșalonarea refresh-urilor între intrări: fiecare intrare rulează la
+# un decalaj determinist în interval (derivat din entry_id), plus jitter
+REFRESH_JITTER_MAX = 30       # secunde (plafonat la 5% din interval)
+
+# Semnal dispatcher emis când structura contului (NLC-urile) se schimbă;
+# formatat cu entry_id, payload = HierarchyChange
+SIGNAL_HIERARCHY_CHANGED = f"{DOMAIN}_hierarchy_changed_{{entry_id}}"
+
+# Reîncercarea endpoint-urilor eșuate (backoff exponențial, secunde)
+FAILED_RETRY_BASE = 30
+FAILED_RETRY_MAX = 900
+FAILED_RETRY_ATTEMPTS = 5
+
+# Bucket-urile indexate după codul client (restul sunt indexate după NLC)
+CLIENT_BUCKETS: tuple[str, ...] = ("client_data", "invoices", "payments")
+
+# Bucket-urile din coordinator.data publicate de fiecare domeniu
+DOMAIN_BUCKETS: dict[str, tuple[str, ...]] = {
+    "structure": ("client_data", "contract_details"),
+    "billing": ("invoices", "payments"),
+    "metering": ("meter_list", "readings"),
+    "convention": ("convention",),
+}
+
 # ──────────────────────────────────────────────
 # Headere HTTP
 # ──────────────────────────────────────────────
@@ -64,25 +101,65 @@ URL_CONVENTION = f"{BASE_URL}/consumtion-convention/{{nlc}}"
 URL_SET_INDEX = f"{BASE_URL}/set-index"
 
 # ──────────────────────────────────────────────
-# Mapare luni → română
+# Sincronizare incrementală facturi / plăți
+# ──────────────────────────────────────────────
+BILLING_HISTORY_DAYS = 730             # fereastra istoricului păstrat (2 ani)
+BILLING_OVERLAP_DAYS = 45              # suprapunere la sincronizarea de rutină
+BILLING_FULL_RESYNC = 7 * 24 * 3600    # resincronizare completă (secunde)
+
 # ──────────────────────────────────────────────
+# Reîncercări API (erori tranzitorii: 5xx, 429, timeout)
+# ──────────────────────────────────────────────
+RETRY_MAX_ATTEMPTS = 3      # încercări totale per request
+RETRY_BASE_DELAY = 1.0      # secunde (dublată la fiecare încercare)
+RETRY_MAX_DELAY = 20.0      # plafonul pauzei dintre încercări (secunde)
+
+# Rate limiter comun tuturor intrărilor (token bucket) — opțional.
+# Implicit dezactivat: cu 2 req/s, un refresh la rece al unui cont cu
+# 40 de NLC-uri (~160 request-uri) ar dura peste un minut; concurența
+# per cont (semaforul) rămâne singura limită.  Se activează din opțiuni.
+RATE_LIMIT_PER_SECOND = 0.0     # request-uri pe secundă (0 = fără limită)
+RATE_LIMIT_BURST = 10           # request-uri permise în rafală
+
+# Circuit breaker per familie de endpoint-uri
+BREAKER_FAILURE_THRESHOLD = 3   # eșecuri finale consecutive până la deschidere
+BREAKER_RECOVERY_TIMEOUT = 60   # secunde până la primul probe (half-open)
+BREAKER_MAX_RECOVERY = 900      # plafonul pauzei (se dublează la probe eșuat)
 
-# Mapping luni EN -> RO
-MONTHS_EN_RO: dict[str, str] = {
-    "January": "ianuarie",
-    "February": "februarie",
-    "March": "martie",
-    "April": "aprilie",
-    "May": "mai",
-    "June": "iunie",
-    "July": "iulie",
-    "August": "august",
-    "September": "septembrie",
-    "October": "octombrie",
-    "November": "noiembrie",
-    "December": "decembrie",
+# ──────────────────────────────────────────────
+# Cache răspunsuri API (TTL per endpoint, secunde)
+# ──────────────────────────────────────────────
+# Cheile coincid cu bucket-urile din coordinator.data.
+# TTL 0 = fără cache.
+CACHE_TTL: dict[str, int] = {
+    "hierarchy": 24 * 3600,         # structura contului — foarte rar
+    "client_data": 24 * 3600,       # date client — foarte rar
+    "contract_details": 12 * 3600,  # detalii contract NLC
+    "convention": 24 * 3600,        # convenție consum — lunar
+    "meter_list": 3 * 3600,         # contoare + PAC — de câteva ori pe lună
+    "readings": 3 * 3600,           # istoric citiri — de câteva ori pe lună
+    "invoices": 3 * 3600,           # facturi — săptămânal
+    "payments": 3 * 3600,           # plăți — săptămânal
 }
 
+# Număr maxim de răspunsuri păstrate în cache (evicție LRU)
+CACHE_MAX_ENTRIES = 1024
+
+# Retenție compactă: din răspunsuri se păstrează doar câmpurile folosite
+# de senzori și butoane (cache API, istoric facturare, coordinator.data)
+DEFAULT_COMPACT_RETENTION = True
+
+# Cât timp rămâne valabilă ierarhia obținută în config / options flow,
+# predată primului refresh al coordinator-ului (secunde)
+HANDOFF_TTL = 600
+
+# Vechimea maximă a snapshot-ului restaurat la pornire (secunde)
+SNAPSHOT_MAX_AGE = 7 * 24 * 3600
+
+# ──────────────────────────────────────────────
+# Mapare luni → română
+# ──────────────────────────────────────────────
+
 # Mapping luni numeric (string zero-padded) -> RO
 MONTHS_NUM_RO: dict[str, str] = {
     "01": "ianuarie",
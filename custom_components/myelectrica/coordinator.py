@@ -8,73 +8,137 @@ Structura ierarhică descoperită automat:
   Cont → Coduri client → Contracte (ContractAccount) → NLC-uri (LocConsum)
 
 Doar NLC-urile selectate de utilizator sunt preluate.
+
+Request-urile per cod client și per NLC rulează în paralel, limitate
+de un semafor per cont (`max_concurrency`), astfel încât durata unui
+refresh să fie apropiată de cel mai lent request, nu de suma lor.
+Ritmul global (toate conturile) este limitat de un rate limiter comun
+(`rate_limit` / `rate_burst`).
+
+Facturile și plățile se sincronizează incremental (vezi billing.py).
+
+Datele sunt împărțite în domenii (structură, facturare, contoare,
+convenție), fiecare cu intervalul propriu (`REFRESH_DOMAINS`) și
+tratare independentă a erorilor.  Toate publică în același `self.data`.
+
+Un endpoint eșuat își păstrează ultima valoare bună (marcată ca
+învechită) și doar el este reîncercat, cu backoff scurt.
+
+Ierarhia este păstrată împreună cu o amprentă (hash) a conținutului;
+mapările NLC se recalculează doar când amprenta se schimbă, iar
+schimbarea setului de NLC-uri este anunțată prin SIGNAL_HIERARCHY_CHANGED.
+
+La fiecare publicare se calculează o amprentă de conținut per (bucket,
+cheie); entitățile (ChangeAwareEntity) scriu starea doar dacă amprentele
+intrărilor lor s-au schimbat.
+
+Ciclurile sunt eșalonate: fiecare intrare rulează la momentele
+`fază + k × interval` (faza derivată determinist din entry_id), cu un
+jitter mic — conturile nu mai pornesc simultan după un restart HA.
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import logging
-from datetime import timedelta
+import math
+import random
+import time
+from collections.abc import Awaitable
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
+    CoordinatorEntity,
     UpdateFailed,
 )
+from homeassistant.util import dt as dt_util
 
-from .api import MyElectricaAPI
-from .const import DEFAULT_UPDATE, DOMAIN, LICENSE_DATA_KEY
+from .api import (
+    MyElectricaAPI,
+    async_pop_handoff,
+    async_remove_entry_rate_limits,
+    async_set_entry_rate_limits,
+)
+from .billing import (
+    BillingHistory,
+    build_billing_views,
+    extract_records,
+    with_records,
+)
+from .const import (
+    CLIENT_BUCKETS,
+    DEFAULT_COMPACT_RETENTION,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_UPDATE,
+    DOMAIN,
+    DOMAIN_BUCKETS,
+    FAILED_RETRY_ATTEMPTS,
+    FAILED_RETRY_BASE,
+    FAILED_RETRY_MAX,
+    LICENSE_DATA_KEY,
+    REFRESH_DOMAINS,
+    REFRESH_JITTER_MAX,
+    SIGNAL_HIERARCHY_CHANGED,
+    SNAPSHOT_MAX_AGE,
+)
+from .helper import deep_sizeof
+from .index import NlcIndex
+from .models import NORMALIZERS
+from .resilience import ConcurrencyLimit
+from .storage import async_get_snapshot_store, async_get_token_store
 
 _LOGGER = logging.getLogger(__name__)
 
+# Toleranța la verificarea scadenței unui domeniu (secunde)
+DOMAIN_TOLERANCE = 60
+
 type MyElectricaConfigEntry = ConfigEntry[MyElectricaCoordinator]
 
 
-def _extract_nlc_mappings(
-    hierarchy: list[dict],
-    selected_nlcs: list[str] | None = None,
-) -> tuple[dict[str, str], dict[str, str], list[str], list[str]]:
-    """
-    Extrage din ierarhie mapările necesare.
+def _stable_fraction(value: str) -> float:
+    """Fracțiune deterministă în [0, 1), derivată dintr-un șir."""
+    digest = hashlib.sha256(value.encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
 
-    Dacă selected_nlcs este furnizat, filtrează doar NLC-urile din listă.
-    Codurile client returnate sunt doar cele care au cel puțin un NLC selectat.
 
-    Returnează:
-        nlc_to_client:           {nlc: client_code}
-        nlc_to_contract_account: {nlc: contract_account}
-        needed_client_codes:     [client_code, ...]
-        filtered_nlcs:           [nlc, ...]
-    """
-    nlc_to_client: dict[str, str] = {}
-    nlc_to_contract_account: dict[str, str] = {}
-    needed_client_codes: list[str] = []
-    filtered_nlcs: list[str] = []
-
-    for client in hierarchy:
-        cc = client.get("ClientCode", "")
+def _content_hash(value: Any) -> str:
+    """Amprenta (hash) conținutului unui răspuns API."""
+    payload = json.dumps(
+        value, sort_keys=True, default=str, separators=(",", ":")
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
 
-        for contract in client.get("to_ContContract", []):
-            ca = contract.get("ContractAccount", "")
-            for loc in contract.get("to_LocConsum", []):
-                nlc = loc.get("IdLocConsum", "")
-                if not nlc:
-                    continue
 
-                # Filtrare: dacă avem selecție, includem doar NLC-urile selectate
-                if selected_nlcs and nlc not in selected_nlcs:
-                    continue
+def _hierarchy_fingerprint(
+    hierarchy: list[dict], selected_nlcs: list[str] | None
+) -> str:
+    """Amprenta conținutului ierarhiei (+ selecția NLC)."""
+    payload = json.dumps(
+        [hierarchy, sorted(selected_nlcs or [])],
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
 
-                if nlc not in filtered_nlcs:
-                    filtered_nlcs.append(nlc)
-                nlc_to_client[nlc] = cc
-                nlc_to_contract_account[nlc] = ca
 
-                if cc and cc not in needed_client_codes:
-                    needed_client_codes.append(cc)
+@dataclass(frozen=True, slots=True)
+class HierarchyChange:
+    """Payload-ul SIGNAL_HIERARCHY_CHANGED."""
 
-    return nlc_to_client, nlc_to_contract_account, needed_client_codes, filtered_nlcs
+    added: tuple[str, ...]
+    removed: tuple[str, ...]
+    nlcs: tuple[str, ...]
+    fingerprint: str
 
 
 class MyElectricaCoordinator(DataUpdateCoordinator[dict[str, Any]]):
@@ -93,6 +157,9 @@ class MyElectricaCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         "convention":              {nlc: list[dict]}, # 8.1 per NLC
         "nlc_to_client":           {nlc: cc},
         "nlc_to_contract_account": {nlc: ca},
+        "index":                   NlcIndex,          # vezi index.py
+        "records":                 {bucket: {cheie: înregistrare}},
+        "billing_views":           {(cc, ca): BillingView},
     }
     """
 
@@ -113,89 +180,1062 @@ class MyElectricaCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             hass,
             username=config_entry.data["username"],
             password=config_entry.data["password"],
+            proactive_refresh=True,
+            token_store=async_get_token_store(hass),
+            rate_limiter=async_set_entry_rate_limits(
+                hass,
+                config_entry.entry_id,
+                rate=config_entry.data.get("rate_limit"),
+                burst=config_entry.data.get("rate_burst"),
+            ),
+            compact=config_entry.data.get(
+                "compact_retention", DEFAULT_COMPACT_RETENTION
+            ),
         )
 
+        # Ierarhia tocmai descărcată de config / options flow — primul
+        # refresh o ia din cache, fără un request în plus
+        handoff = async_pop_handoff(hass, config_entry.data["username"])
+        if handoff:
+            self.api.seed_hierarchy(handoff)
+
         # NLC-urile selectate de utilizator (None = toate)
         self._selected_nlcs: list[str] | None = config_entry.data.get(
             "selected_nlcs"
         )
 
+        # Limită de concurență per cont — un singur semafor per coordinator
+        max_concurrency = config_entry.data.get(
+            "max_concurrency", DEFAULT_MAX_CONCURRENCY
+        )
+        self._semaphore = ConcurrencyLimit(max_concurrency)
+
+        # Statistici de timp per endpoint (ms) — expuse în diagnostics
+        self.endpoint_timings: dict[str, dict[str, float]] = {}
+        self.last_refresh_duration: float | None = None
+
+        # Istoric local facturi / plăți, per (tip, cod client)
+        self._billing: dict[tuple[str, str], BillingHistory] = {}
+
+        # Structura contului (ierarhie + mapări), actualizată de domeniul
+        # "structure" și folosită de celelalte domenii
+        self._hierarchy: list[dict] | None = None
+        self._hierarchy_raw: dict | None = None
+        self._hierarchy_fingerprint: str | None = None
+        self._hierarchy_changed_at: float | None = None
+        self._pending_hierarchy_change: HierarchyChange | None = None
+        self.index = NlcIndex()
+
+        # Generația datelor publicate — crește la fiecare notificare a
+        # entităților; cheia memorizării valorilor calculate de senzori
+        self.generation = 0
+
+        # Amprente de conținut per (bucket, cheie) și statistica scrierilor
+        # de stare — entitățile scriu starea doar când intrările lor se schimbă
+        self.content_hashes: dict[tuple[str, str], str] = {}
+        self._hash_sources: dict[tuple[str, str], Any] = {}
+
+        # Înregistrări normalizate per (bucket, cheie): (răspuns, înregistrare)
+        self._records_cache: dict[tuple[str, str], tuple[Any, Any]] = {}
+        self.write_stats: dict[str, int] = {"efectuate": 0, "omise": 0}
+
+        # Program per domeniu de date (vezi REFRESH_DOMAINS)
+        self._base_interval = float(update_seconds)
+        self._domain_last_run: dict[str, float] = {}
+        self._domain_errors: dict[str, str | None] = {}
+
+        # Eșalonare: faza intrării în interval și momentul următorului ciclu
+        self._phase = _stable_fraction(config_entry.entry_id) * self._base_interval
+        self.next_refresh: datetime | None = None
+
+        # Ultima valoare bună per endpoint: (bucket, cheie) → de când e
+        # învechită / câte încercări eșuate consecutive are
+        self._stale_since: dict[tuple[str, str], float] = {}
+        self._failed: dict[tuple[str, str], int] = {}
+        self._unsub_failed_retry: CALLBACK_TYPE | None = None
+
+        # Snapshot persistent al ultimelor date bune (pornire rapidă)
+        self._snapshot = async_get_snapshot_store(hass, config_entry.entry_id)
+        self._snapshot_signature: tuple | None = None
+        self.restored_at: float | None = None
+
+    async def async_shutdown(self) -> None:
+        """Oprește timer-ele API-ului la descărcarea intrării."""
+        await super().async_shutdown()
+        self._cancel_failed_retry()
+        # Scrierea amânată a snapshot-ului nu trebuie să supraviețuiască
+        # coordinator-ului (la reload, noul coordinator îl citește imediat)
+        await self._snapshot.async_flush()
+        async_remove_entry_rate_limits(self.hass, self.config_entry.entry_id)
+        await self.api.async_close()
+
+    def _record_timing(self, endpoint: str, elapsed_ms: float) -> None:
+        """Actualizează statisticile de timp pentru un endpoint."""
+        stats = self.endpoint_timings.setdefault(
+            endpoint,
+            {"count": 0, "last_ms": 0.0, "max_ms": 0.0, "total_ms": 0.0},
+        )
+        stats["count"] += 1
+        stats["last_ms"] = round(elapsed_ms, 1)
+        stats["max_ms"] = round(max(stats["max_ms"], elapsed_ms), 1)
+        stats["total_ms"] = round(stats["total_ms"] + elapsed_ms, 1)
+
+    async def _fetch(self, endpoint: str, request: Awaitable[Any]) -> Any:
+        """Execută un request sub semaforul contului și îi măsoară durata."""
+        async with self._semaphore:
+            start = time.monotonic()
+            try:
+                return await request
+            finally:
+                self._record_timing(
+                    endpoint, (time.monotonic() - start) * 1000
+                )
+
+    async def _async_sync_billing(
+        self, kind: str, client_code: str, force: bool
+    ) -> dict | list | None:
+        """
+        Facturi sau plăți pentru un cod client, sincronizate incremental.
+
+        La prima rulare, periodic (`BILLING_FULL_RESYNC`) și la refresh
+        forțat cerem fereastra completă; altfel doar o fereastră scurtă,
+        îmbinată în istoricul local.  Forma răspunsului rămâne aceeași.
+        """
+        history = self._billing.get((kind, client_code))
+        if history is None:
+            history = self._billing[(kind, client_code)] = BillingHistory(kind)
+
+        fetch = (
+            self.api.async_get_invoices
+            if kind == "invoices"
+            else self.api.async_get_payments
+        )
+        today = date.today()
+        full_sync = force or history.needs_full_sync()
+        start = None if full_sync else history.window_start(today)
+
+        raw = await fetch(client_code, force=force, start=start)
+        records = extract_records(raw)
+        if raw is None or records is None:
+            return raw
+
+        if start is None:
+            history.replace(records)
+            return raw
+
+        history.merge(records, start, today)
+        _LOGGER.debug(
+            "[MyElectrica] Sincronizare incrementală %s (%s): %s noi, %s total",
+            kind,
+            client_code,
+            len(records),
+            len(history.records),
+        )
+        return with_records(raw, history.records)
+
+    @property
+    def billing_summary(self) -> dict[str, dict[str, int]]:
+        """Dimensiunea istoricului local de facturi / plăți (diagnostics)."""
+        summary: dict[str, dict[str, int]] = {}
+        for (kind, _), history in self._billing.items():
+            entry = summary.setdefault(kind, {"coduri_client": 0, "inregistrari": 0})
+            entry["coduri_client"] += 1
+            entry["inregistrari"] += len(history.records)
+        return summary
+
+    @property
+    def memory_footprint(self) -> dict[str, Any]:
+        """
+        Memoria ocupată de date, măsurată (KB, diagnostics).
+
+        Obiectele partajate între componente (ex. răspunsurile din cache
+        reutilizate în coordinator.data) sunt numărate o singură dată, la
+        prima componentă în care apar; totalul este exact.
+        """
+        data = self.data or {}
+        derived = ("records", "billing_views", "index")
+        seen: set[int] = set()
+        parts = {
+            "raspunsuri": {
+                key: value for key, value in data.items() if key not in derived
+            },
+            "inregistrari": data.get("records"),
+            "vederi_facturare": data.get("billing_views"),
+            "index": self.index,
+            "istoric_facturare": [h.records for h in self._billing.values()],
+            "cache_api": self.api.cache.values(),
+        }
+        sizes = {name: deep_sizeof(obj, seen) for name, obj in parts.items()}
+        result: dict[str, Any] = {
+            "retentie_compacta": self.api.compact,
+            **{f"{name}_kb": round(size / 1024, 1) for name, size in sizes.items()},
+        }
+        result["total_kb"] = round(sum(sizes.values()) / 1024, 1)
+        return result
+
+    # ── Domenii de date ──────────────────────────
+
+    def _domain_interval(self, domain: str) -> float:
+        """Intervalul efectiv al unui domeniu (secunde)."""
+        return max(self._base_interval, REFRESH_DOMAINS[domain])
+
+    def _due_domains(self, now: float) -> list[str]:
+        """Domeniile care trebuie actualizate la acest ciclu."""
+        if not self.data:
+            return list(REFRESH_DOMAINS)
+
+        due: list[str] = []
+        for domain in REFRESH_DOMAINS:
+            last = self._domain_last_run.get(domain)
+            # Toleranță: ciclurile coordinator-ului nu sunt exacte la secundă
+            if (
+                last is None
+                or now - last >= self._domain_interval(domain) - DOMAIN_TOLERANCE
+            ):
+                due.append(domain)
+        return due
+
+    def _domain_keys(self, domain: str) -> list[tuple[str, str]]:
+        """
+        Endpoint-urile unui domeniu, ca perechi (bucket, cheie).
+
+        Request-urile per NLC sunt grupate pe NLC (toate bucket-urile unui
+        NLC consecutiv), iar NLC-urile au o ordine stabilă, derivată din
+        cod — semaforul le eliberează uniform, NLC după NLC.
+        """
+        keys: list[tuple[str, str]] = []
+        nlc_buckets: list[str] = []
+        for bucket in DOMAIN_BUCKETS[domain]:
+            if bucket in CLIENT_BUCKETS:
+                keys.extend((bucket, key) for key in self.index.client_codes)
+            else:
+                nlc_buckets.append(bucket)
+        for nlc in sorted(self.index.nlcs, key=_stable_fraction):
+            keys.extend((bucket, nlc) for bucket in nlc_buckets)
+        return keys
+
+    # ── Eșalonarea ciclurilor ───────────────────
+
+    def _stagger_next_refresh(self) -> None:
+        """
+        Programează următorul ciclu pe slotul intrării.
+
+        Sloturile sunt `fază + k × interval` în timp absolut, deci nu
+        depind de momentul pornirii HA.  Un slot mai apropiat de o
+        jumătate de interval (ex. după un refresh manual) este sărit.
+        """
+        interval = self._base_interval
+        now = time.time()
+        slot = (
+            math.floor((now - self._phase) / interval) + 1
+        ) * interval + self._phase
+        if slot - now < interval / 2:
+            slot += interval
+
+        jitter = min(REFRESH_JITTER_MAX, interval * 0.05)
+        delay = max(slot - now + random.uniform(-jitter, jitter), 1.0)
+        self.update_interval = timedelta(seconds=delay)
+        self.next_refresh = dt_util.utcnow() + timedelta(seconds=delay)
+        _LOGGER.debug(
+            "[MyElectrica] Următorul refresh peste %.0f s (%s)",
+            delay,
+            self.next_refresh.isoformat(),
+        )
+
+    @property
+    def schedule_info(self) -> dict[str, Any]:
+        """Programarea ciclurilor (diagnostics)."""
+        return {
+            "interval_s": int(self._base_interval),
+            "faza_s": round(self._phase),
+            "urmatorul_refresh": (
+                self.next_refresh.isoformat() if self.next_refresh else None
+            ),
+        }
+
+    def _request(self, bucket: str, key: str, force: bool) -> Awaitable[Any]:
+        """Request-ul API corespunzător unei perechi (bucket, cheie)."""
+        api = self.api
+        if bucket == "client_data":
+            return api.async_get_client_data(key, force=force)
+        if bucket in ("invoices", "payments"):
+            return self._async_sync_billing(bucket, key, force)
+        if bucket == "contract_details":
+            return api.async_get_contract_nlc(key, force=force)
+        if bucket == "meter_list":
+            return api.async_get_meter_list(key, force=force)
+        if bucket == "readings":
+            cc = self.index.nlc_client.get(key, "")
+            return api.async_get_readings(cc, key, force=force)
+        if bucket == "convention":
+            return api.async_get_convention(key, force=force)
+        raise ValueError(f"Bucket necunoscut: {bucket}")
+
+    async def _async_fetch_keys(
+        self, keys: list[tuple[str, str]], force: bool
+    ) -> tuple[dict[str, dict[str, Any]], int]:
+        """
+        Rulează în paralel request-urile date.
+
+        Un request eșuat (None sau excepție) păstrează ultima valoare bună
+        din `self.data` și este marcat ca învechit, pentru reîncercare.
+        Returnează (bucket-uri, număr de eșecuri).
+        """
+        results = await asyncio.gather(
+            *(
+                self._fetch(bucket, self._request(bucket, key, force))
+                for bucket, key in keys
+            ),
+            return_exceptions=True,
+        )
+
+        now = time.time()
+        previous = self.data or {}
+        buckets: dict[str, dict[str, Any]] = {}
+        failures = 0
+
+        for (bucket, key), result in zip(keys, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, Exception):
+                _LOGGER.debug(
+                    "[MyElectrica] Eroare la %s (%s): %s", bucket, key, result
+                )
+                result = None
+
+            if result is None:
+                failures += 1
+                self._stale_since.setdefault((bucket, key), now)
+                self._failed[(bucket, key)] = self._failed.get((bucket, key), 0) + 1
+                result = (previous.get(bucket) or {}).get(key)
+            else:
+                self._stale_since.pop((bucket, key), None)
+                self._failed.pop((bucket, key), None)
+
+            buckets.setdefault(bucket, {})[key] = result
+
+        return buckets, failures
+
+    async def _async_run_domain(
+        self, domain: str
+    ) -> tuple[dict[str, dict[str, Any]], int, int]:
+        """
+        Rulează request-urile unui domeniu.
+
+        Returnează (bucket-uri, număr request-uri, număr eșecuri).
+        """
+        keys = self._domain_keys(domain)
+        buckets, failures = await self._async_fetch_keys(keys, False)
+        for bucket in DOMAIN_BUCKETS[domain]:
+            buckets.setdefault(bucket, {})
+        return buckets, len(keys), failures
+
+    def _attach_derived(self, data: dict[str, Any]) -> None:
+        """Recalculează datele derivate (o dată per publicare)."""
+        records = self._normalize(data)
+        data["records"] = records
+        data["billing_views"] = build_billing_views(
+            records["invoices"], records["payments"], self.index
+        )
+        self._update_content_hashes(data)
+
+    def _normalize(self, data: dict[str, Any]) -> dict[str, dict[str, Any]]:
+        """
+        Înregistrările tipizate (models.py) pentru fiecare bucket.
+
+        Un răspuns păstrat neschimbat (același obiect) nu este renormalizat.
+        """
+        records: dict[str, dict[str, Any]] = {}
+        cache: dict[tuple[str, str], tuple[Any, Any]] = {}
+        for bucket, normalize in NORMALIZERS.items():
+            out = records[bucket] = {}
+            for key, raw in (data.get(bucket) or {}).items():
+                pair = (bucket, key)
+                cached = self._records_cache.get(pair)
+                if cached is None or cached[0] is not raw:
+                    cached = (raw, normalize(raw))
+                cache[pair] = cached
+                out[key] = cached[1]
+        self._records_cache = cache
+        return records
+
+    def _update_content_hashes(self, data: dict[str, Any]) -> None:
+        """
+        Amprenta conținutului fiecărei perechi (bucket, cheie).
+
+        Valorile păstrate neschimbate (același obiect — cache API sau
+        ultima valoare bună) nu sunt rehash-uite.
+        """
+        seen: set[tuple[str, str]] = set()
+        for buckets in DOMAIN_BUCKETS.values():
+            for bucket in buckets:
+                for key, value in (data.get(bucket) or {}).items():
+                    pair = (bucket, key)
+                    seen.add(pair)
+                    if self._hash_sources.get(pair) is value:
+                        continue
+                    self._hash_sources[pair] = value
+                    self.content_hashes[pair] = _content_hash(value)
+        for pair in set(self.content_hashes) - seen:
+            self.content_hashes.pop(pair, None)
+            self._hash_sources.pop(pair, None)
+
+    def content_hash(self, bucket: str, key: str) -> str | None:
+        """Amprenta curentă a unei perechi (bucket, cheie)."""
+        return self.content_hashes.get((bucket, key))
+
+    @property
+    def hierarchy_fingerprint(self) -> str | None:
+        """Amprenta ierarhiei curente."""
+        return self._hierarchy_fingerprint
+
+    # ── Reîncercarea endpoint-urilor eșuate ─────
+
+    def _schedule_failed_retry(self) -> None:
+        """Programează reîncercarea (doar) a endpoint-urilor eșuate."""
+        self._cancel_failed_retry()
+        pending = [
+            attempts
+            for attempts in self._failed.values()
+            if attempts < FAILED_RETRY_ATTEMPTS
+        ]
+        if not pending:
+            return
+        delay = min(
+            FAILED_RETRY_BASE * 2 ** (min(pending) - 1), FAILED_RETRY_MAX
+        )
+        _LOGGER.debug(
+            "[MyElectrica] %s endpoint-uri eșuate — reîncercare în %s s",
+            len(pending),
+            delay,
+        )
+        self._unsub_failed_retry = async_call_later(
+            self.hass, delay, self._async_retry_failed
+        )
+
+    def _cancel_failed_retry(self) -> None:
+        if self._unsub_failed_retry is not None:
+            self._unsub_failed_retry()
+            self._unsub_failed_retry = None
+
+    async def _async_retry_failed(self, _now) -> None:
+        """Reîncearcă endpoint-urile eșuate și publică rezultatul."""
+        self._unsub_failed_retry = None
+        if not self.data:
+            return
+
+        valid_owners = {*self.index.client_codes, *self.index.nlcs}
+        for failed_key in list(self._failed):
+            if failed_key[1] not in valid_owners:
+                self._failed.pop(failed_key, None)
+                self._stale_since.pop(failed_key, None)
+
+        keys = [
+            key
+            for key, attempts in self._failed.items()
+            if attempts < FAILED_RETRY_ATTEMPTS
+        ]
+        if not keys:
+            return
+
+        buckets, failures = await self._async_fetch_keys(keys, False)
+        _LOGGER.debug(
+            "[MyElectrica] Reîncercare: %s/%s endpoint-uri recuperate",
+            len(keys) - failures,
+            len(keys),
+        )
+
+        if failures < len(keys):
+            self._publish_buckets(buckets)
+
+        self._schedule_failed_retry()
+
+    @callback
+    def _publish_buckets(self, buckets: dict[str, dict[str, Any]]) -> None:
+        """
+        Îmbină rezultate parțiale în datele curente și le publică.
+
+        Ciclul principal de refresh nu este reprogramat; entitățile ale
+        căror intrări nu s-au schimbat nu își rescriu starea.
+        """
+        data = dict(self.data or {})
+        for bucket, values in buckets.items():
+            data[bucket] = {**(data.get(bucket) or {}), **values}
+        self._attach_derived(data)
+        self.data = data
+        self.async_update_listeners()
+        self._schedule_snapshot_save()
+
+    async def async_refresh_nlc(
+        self,
+        nlc: str,
+        buckets: tuple[str, ...] = ("meter_list", "readings"),
+    ) -> bool:
+        """
+        Refresh țintit: doar bucket-urile date, pentru un singur NLC.
+
+        Folosit după trimiterea unui index — două request-uri (fără
+        cache) în locul unui ciclu complet.  Returnează True dacă cel
+        puțin un răspuns a fost obținut și publicat.
+        """
+        if not self.data or nlc not in self.index.locs:
+            return False
+        keys = [(bucket, nlc) for bucket in buckets]
+        fetched, failures = await self._async_fetch_keys(keys, True)
+        _LOGGER.debug(
+            "[MyElectrica] Refresh țintit NLC %s (%s): %s/%s reușite",
+            nlc,
+            ", ".join(buckets),
+            len(keys) - failures,
+            len(keys),
+        )
+        if failures:
+            self._schedule_failed_retry()
+        if failures == len(keys):
+            return False
+        self._publish_buckets(fetched)
+        return True
+
+    @property
+    def stale_summary(self) -> dict[str, Any]:
+        """Endpoint-urile care servesc ultima valoare bună (diagnostics)."""
+        now = time.time()
+        per_bucket: dict[str, int] = {}
+        for bucket, _ in self._stale_since:
+            per_bucket[bucket] = per_bucket.get(bucket, 0) + 1
+        return {
+            "endpoint_uri_invechite": len(self._stale_since),
+            "per_bucket": per_bucket,
+            "cel_mai_vechi_s": (
+                round(now - min(self._stale_since.values()))
+                if self._stale_since
+                else None
+            ),
+        }
+
+    def stale_since(self, bucket: str, key: str) -> float | None:
+        """Momentul (epoch) de când valoarea unui endpoint este învechită."""
+        return self._stale_since.get((bucket, key))
+
+    async def _async_refresh_hierarchy(self) -> bool:
+        """
+        Actualizează ierarhia și mapările NLC.
+
+        Răspunsul vine de obicei din cache-ul API (TTL lung); mapările se
+        recalculează doar dacă amprenta conținutului s-a schimbat.
+        Returnează True dacă setul de NLC-uri / coduri client s-a schimbat.
+        """
+        hierarchy_raw = await self._fetch(
+            "hierarchy", self.api.async_get_hierarchy()
+        )
+        if not hierarchy_raw:
+            raise UpdateFailed("Nu s-a putut obține ierarhia contului")
+        if hierarchy_raw is self._hierarchy_raw:
+            # Același obiect din cache — nimic de recalculat
+            return False
+
+        hierarchy = hierarchy_raw.get("details", [])
+        if not hierarchy:
+            raise UpdateFailed("Ierarhia contului este goală")
+
+        fingerprint = _hierarchy_fingerprint(hierarchy, self._selected_nlcs)
+        self._hierarchy_raw = hierarchy_raw
+        if fingerprint == self._hierarchy_fingerprint:
+            _LOGGER.debug("[MyElectrica] Ierarhie neschimbată (amprentă identică)")
+            return False
+
+        index = NlcIndex.build(hierarchy, self._selected_nlcs)
+
+        _LOGGER.debug(
+            "[MyElectrica] Descoperite %s coduri client, %s NLC-uri "
+            "(selectate: %s)",
+            len(index.client_codes),
+            len(index.nlcs),
+            len(self._selected_nlcs) if self._selected_nlcs else "toate",
+        )
+
+        previous = self.index
+        changed = (
+            index.nlcs != previous.nlcs
+            or index.client_codes != previous.client_codes
+        )
+        # Orice schimbare de conținut este anunțată (added/removed pot fi
+        # goale, ex. o adresă modificată); prima încărcare nu este anunțată
+        if self._hierarchy_fingerprint is not None:
+            self._pending_hierarchy_change = HierarchyChange(
+                added=tuple(n for n in index.nlcs if n not in previous.locs),
+                removed=tuple(n for n in previous.nlcs if n not in index.locs),
+                nlcs=index.nlcs,
+                fingerprint=fingerprint,
+            )
+        self._hierarchy_fingerprint = fingerprint
+        self._hierarchy_changed_at = time.time()
+        self._hierarchy = hierarchy
+        self.index = index
+        return changed
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notifică entitățile, apoi anunță o eventuală schimbare de structură.
+
+        Semnalul pleacă după publicarea datelor, astfel încât abonații
+        (platformele) găsesc deja datele noilor NLC-uri în `self.data`.
+        """
+        self.generation += 1
+        super().async_update_listeners()
+        change = self._pending_hierarchy_change
+        if change is None or not self.last_update_success:
+            return
+        self._pending_hierarchy_change = None
+        _LOGGER.info(
+            "[MyElectrica] Structura contului s-a schimbat: +%s / -%s NLC-uri",
+            list(change.added),
+            list(change.removed),
+        )
+        async_dispatcher_send(
+            self.hass,
+            SIGNAL_HIERARCHY_CHANGED.format(entry_id=self.config_entry.entry_id),
+            change,
+        )
+
+    # ── Reconfigurare live ───────────────────────
+
+    async def async_apply_options(
+        self, update_interval: int, selected_nlcs: list[str] | None
+    ) -> None:
+        """
+        Aplică noile setări fără reîncărcarea intrării.
+
+        Limitele (concurență, rată) se aplică imediat, pentru request-urile
+        următoare.  Un interval nou declanșează un ciclu (doar domeniile
+        scadente), care programează următorul ciclu pe noul slot.  La o selecție NLC nouă,
+        indexul se reconstruiește din ierarhia deja cunoscută (sau predată
+        de options flow), se descarcă doar NLC-urile / codurile client
+        nou apărute, iar cele deselectate sunt eliminate din date.
+        Entitățile sunt reconciliate prin SIGNAL_HIERARCHY_CHANGED.
+        """
+        data = self.config_entry.data
+        # Redimensionat pe loc — request-urile în curs rămân numărate
+        self._semaphore.resize(
+            data.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+        )
+        async_set_entry_rate_limits(
+            self.hass,
+            self.config_entry.entry_id,
+            rate=data.get("rate_limit"),
+            burst=data.get("rate_burst"),
+        )
+
+        if float(update_interval) != self._base_interval:
+            self._base_interval = float(update_interval)
+            self._phase = (
+                _stable_fraction(self.config_entry.entry_id)
+                * self._base_interval
+            )
+            _LOGGER.debug(
+                "[MyElectrica] Interval nou: %s s (fără reîncărcare)",
+                update_interval,
+            )
+            # Un ciclu acum: rulează doar domeniile scadente (de obicei
+            # niciunul), apoi _async_update_data programează următorul
+            # ciclu pe slotul noului interval și notifică entitățile
+            await self.async_request_refresh()
+
+        handoff = async_pop_handoff(
+            self.hass, self.config_entry.data["username"]
+        )
+        if handoff:
+            self.api.seed_hierarchy(handoff)
+
+        if (selected_nlcs or None) == (self._selected_nlcs or None):
+            return
+        self._selected_nlcs = selected_nlcs
+
+        previous = self.index
+        # Forțăm recalcularea: amprenta include selecția
+        self._hierarchy_raw = None
+        await self._async_refresh_hierarchy()
+        index = self.index
+        if index is previous or not self.data:
+            return
+
+        new_clients = [
+            cc for cc in index.client_codes if cc not in previous.client_nlcs
+        ]
+        new_nlcs = [nlc for nlc in index.nlcs if nlc not in previous.locs]
+        keys = [
+            (bucket, owner)
+            for buckets in DOMAIN_BUCKETS.values()
+            for bucket in buckets
+            for owner in (
+                new_clients if bucket in CLIENT_BUCKETS else new_nlcs
+            )
+        ]
+        buckets, failures = await self._async_fetch_keys(keys, False)
+        _LOGGER.debug(
+            "[MyElectrica] Selecție nouă: +%s NLC-uri, %s request-uri (%s eșuate)",
+            len(new_nlcs),
+            len(keys),
+            failures,
+        )
+
+        # Datele existente, fără NLC-urile / codurile client deselectate
+        owners = {*index.client_codes, *index.nlcs}
+        data = dict(self.data)
+        for bucket in (b for bs in DOMAIN_BUCKETS.values() for b in bs):
+            values = {
+                key: value
+                for key, value in (data.get(bucket) or {}).items()
+                if key in owners
+            }
+            values.update(buckets.get(bucket) or {})
+            data[bucket] = values
+        for pair in [p for p in self._stale_since if p[1] not in owners]:
+            self._stale_since.pop(pair, None)
+        for pair in [p for p in self._failed if p[1] not in owners]:
+            self._failed.pop(pair, None)
+        for pair in [p for p in self._billing if p[1] not in owners]:
+            self._billing.pop(pair, None)
+
+        self._publish_hierarchy(data)
+        self._attach_derived(data)
+        # Publicăm fără a reprograma ciclul principal de refresh
+        self.data = data
+        self.async_update_listeners()
+        self._schedule_snapshot_save()
+        self._schedule_failed_retry()
+
+    # ── Snapshot persistent ──────────────────────
+
+    def _publish_hierarchy(self, data: dict[str, Any]) -> None:
+        """Ierarhia și mapările curente, în datele publicate."""
+        data["hierarchy"] = self._hierarchy
+        data["nlc_to_client"] = self.index.nlc_client
+        data["nlc_to_contract_account"] = self.index.nlc_contract
+        data["index"] = self.index
+
+    async def async_restore_snapshot(self) -> bool:
+        """
+        Restaurează ultimele date bune salvate, fără niciun request API.
+
+        Indexul și datele derivate se reconstruiesc din răspunsurile
+        salvate; toate valorile sunt marcate ca învechite până la primul
+        refresh reușit.  Returnează True dacă datele au fost publicate.
+        """
+        snapshot = await self._snapshot.async_load()
+        if not snapshot:
+            return False
+
+        saved_at = snapshot.get("saved_at") or 0
+        hierarchy = snapshot.get("hierarchy")
+        buckets = snapshot.get("buckets")
+        if (
+            not hierarchy
+            or not isinstance(buckets, dict)
+            or time.time() - saved_at > SNAPSHOT_MAX_AGE
+        ):
+            _LOGGER.debug("[MyElectrica] Snapshot absent, incomplet sau prea vechi")
+            return False
+
+        index = NlcIndex.build(hierarchy, self._selected_nlcs)
+        if not index.nlcs:
+            return False
+        self._hierarchy = hierarchy
+        self._hierarchy_fingerprint = _hierarchy_fingerprint(
+            hierarchy, self._selected_nlcs
+        )
+        self.index = index
+
+        # Doar cheile care aparțin încă selecției curente
+        owners = {*index.client_codes, *index.nlcs}
+        data: dict[str, Any] = {}
+        for bucket in (b for bs in DOMAIN_BUCKETS.values() for b in bs):
+            values = {
+                key: value
+                for key, value in (buckets.get(bucket) or {}).items()
+                if key in owners
+            }
+            data[bucket] = values
+            for key in values:
+                self._stale_since[(bucket, key)] = saved_at
+        self._publish_hierarchy(data)
+        self._attach_derived(data)
+        self._snapshot_signature = self._snapshot_key()
+
+        # Fără async_set_updated_data — ar amâna refresh-ul real cu un
+        # interval întreg; domeniile rămân scadente (nicio rulare înregistrată)
+        self.data = data
+        self.restored_at = saved_at
+        _LOGGER.info(
+            "[MyElectrica] Date restaurate din snapshot (%s NLC-uri, vechime %s s)",
+            len(index.nlcs),
+            round(time.time() - saved_at),
+        )
+        return True
+
+    def _snapshot_key(self) -> tuple:
+        """Semnătura conținutului salvabil (amprente ierarhie + bucket-uri)."""
+        return (
+            self._hierarchy_fingerprint,
+            tuple(sorted(self.content_hashes.items())),
+        )
+
+    def _schedule_snapshot_save(self) -> None:
+        """Programează salvarea snapshot-ului, dacă datele s-au schimbat."""
+        signature = self._snapshot_key()
+        if signature == self._snapshot_signature:
+            return
+        self._snapshot_signature = signature
+        self._snapshot.async_schedule_save(self._snapshot_data)
+
+    @callback
+    def _snapshot_data(self) -> dict[str, Any]:
+        """Conținutul snapshot-ului (evaluat la momentul scrierii)."""
+        data = self.data or {}
+        return {
+            "saved_at": time.time(),
+            "hierarchy": self._hierarchy,
+            "buckets": {
+                bucket: data.get(bucket) or {}
+                for buckets in DOMAIN_BUCKETS.values()
+                for bucket in buckets
+            },
+        }
+
+    @property
+    def hierarchy_info(self) -> dict[str, Any]:
+        """Amprenta și vechimea structurii contului (diagnostics)."""
+        return {
+            "amprenta": (
+                self._hierarchy_fingerprint[:12]
+                if self._hierarchy_fingerprint
+                else None
+            ),
+            "schimbata_acum_s": (
+                round(time.time() - self._hierarchy_changed_at)
+                if self._hierarchy_changed_at
+                else None
+            ),
+            "nlc_uri": len(self.index.nlcs),
+            "coduri_client": len(self.index.client_codes),
+        }
+
+    @property
+    def domain_status(self) -> dict[str, dict[str, Any]]:
+        """Starea fiecărui domeniu de date (diagnostics)."""
+        now = time.time()
+        return {
+            domain: {
+                "interval_s": int(self._domain_interval(domain)),
+                "ultima_rulare_acum_s": (
+                    round(now - self._domain_last_run[domain])
+                    if domain in self._domain_last_run
+                    else None
+                ),
+                "eroare": self._domain_errors.get(domain),
+            }
+            for domain in REFRESH_DOMAINS
+        }
+
     async def _async_update_data(self) -> dict[str, Any]:
-        """Fetch periodic — colectează doar endpoint-urile pentru NLC-urile selectate."""
+        """Rulează un ciclu și îl programează pe următorul (eșalonat)."""
+        try:
+            return await self._async_update_domains()
+        finally:
+            self._stagger_next_refresh()
+
+    async def _async_update_domains(self) -> dict[str, Any]:
+        """
+        Fetch periodic — actualizează doar domeniile scadente, pentru
+        NLC-urile selectate.  Un domeniu eșuat își păstrează datele
+        anterioare și nu le afectează pe celelalte.
+        """
         # Verificare licență — nu fetchuim date dacă licența/trial nu e validă
         license_mgr = self.hass.data.get(DOMAIN, {}).get(LICENSE_DATA_KEY)
         if license_mgr and not license_mgr.is_valid:
             _LOGGER.debug("[MyElectrica] Licență invalidă — se omit apelurile API")
             return self.data or {}
 
-        _LOGGER.debug("[MyElectrica] Începe actualizarea datelor")
+        now = time.time()
+        due = self._due_domains(now)
+        if not due:
+            _LOGGER.debug("[MyElectrica] Niciun domeniu scadent la acest ciclu")
+            return self.data
 
-        try:
-            # ── 3.1 Ierarhie (descoperire structură) ──
-            hierarchy_raw = await self.api.async_get_hierarchy()
-            if not hierarchy_raw:
-                raise UpdateFailed("Nu s-a putut obține ierarhia contului")
+        _LOGGER.debug(
+            "[MyElectrica] Începe actualizarea datelor — domenii: %s",
+            ", ".join(due),
+        )
+        refresh_start = time.monotonic()
 
-            hierarchy = hierarchy_raw.get("details", [])
-            if not hierarchy:
-                raise UpdateFailed("Ierarhia contului este goală")
+        # ── 3.1 Ierarhie (descoperire structură) ──
+        if "structure" in due:
+            try:
+                if await self._async_refresh_hierarchy() and self.data:
+                    _LOGGER.debug(
+                        "[MyElectrica] Structura contului s-a schimbat — "
+                        "actualizez toate domeniile"
+                    )
+                    due = list(REFRESH_DOMAINS)
+            except Exception as err:
+                if self._hierarchy is None:
+                    if isinstance(err, UpdateFailed):
+                        raise
+                    _LOGGER.error("[MyElectrica] Eroare la actualizare: %s", err)
+                    raise UpdateFailed(
+                        f"Eroare la actualizarea datelor: {err}"
+                    ) from err
+                # Avem o ierarhie anterioară — celelalte domenii continuă
+                _LOGGER.warning(
+                    "[MyElectrica] Ierarhia nu a putut fi actualizată: %s", err
+                )
+                self._domain_errors["structure"] = str(err)
+                due.remove("structure")
 
-            (
-                nlc_to_client,
-                nlc_to_contract_account,
-                needed_client_codes,
-                filtered_nlcs,
-            ) = _extract_nlc_mappings(hierarchy, self._selected_nlcs)
+        # ── Domeniile scadente (în paralel, independent) ──
+        results = await asyncio.gather(
+            *(self._async_run_domain(domain) for domain in due),
+            return_exceptions=True,
+        )
 
-            _LOGGER.debug(
-                "[MyElectrica] Descoperite %s coduri client, %s NLC-uri "
-                "(selectate: %s)",
-                len(needed_client_codes),
-                len(filtered_nlcs),
-                len(self._selected_nlcs) if self._selected_nlcs else "toate",
+        data: dict[str, Any] = dict(self.data or {})
+        for bucket in (b for buckets in DOMAIN_BUCKETS.values() for b in buckets):
+            data.setdefault(bucket, {})
+
+        succeeded: list[str] = []
+        for domain, result in zip(due, results):
+            if isinstance(result, BaseException):
+                _LOGGER.warning(
+                    "[MyElectrica] Domeniul %s a eșuat (se păstrează datele "
+                    "anterioare): %s",
+                    domain,
+                    result,
+                )
+                self._domain_errors[domain] = str(result)
+                continue
+
+            buckets, total, failures = result
+            data.update(buckets)
+            if total and failures == total:
+                # Nimic nou — domeniul rămâne scadent la ciclul următor
+                _LOGGER.warning(
+                    "[MyElectrica] Domeniul %s: toate cele %s request-uri au "
+                    "eșuat (se păstrează datele anterioare)",
+                    domain,
+                    total,
+                )
+                self._domain_errors[domain] = f"{failures}/{total} request-uri eșuate"
+                continue
+
+            self._domain_last_run[domain] = now
+            self._domain_errors[domain] = (
+                f"{failures}/{total} request-uri eșuate" if failures else None
             )
+            succeeded.append(domain)
 
-            # ── Date per cod client (doar cele necesare) ──
-            client_data: dict[str, Any] = {}
-            invoices: dict[str, Any] = {}
-            payments: dict[str, Any] = {}
-
-            for cc in needed_client_codes:
-                client_data[cc] = await self.api.async_get_client_data(cc)
-                invoices[cc] = await self.api.async_get_invoices(cc)
-                payments[cc] = await self.api.async_get_payments(cc)
-
-            # ── Date per NLC (doar cele selectate) ──
-            contract_details: dict[str, Any] = {}
-            meter_list: dict[str, Any] = {}
-            readings: dict[str, Any] = {}
-            convention: dict[str, Any] = {}
-
-            for nlc in filtered_nlcs:
-                cc = nlc_to_client.get(nlc, "")
-                contract_details[nlc] = await self.api.async_get_contract_nlc(nlc)
-                meter_list[nlc] = await self.api.async_get_meter_list(nlc)
-                readings[nlc] = await self.api.async_get_readings(cc, nlc)
-                convention[nlc] = await self.api.async_get_convention(nlc)
-
-        except UpdateFailed:
-            raise
-        except Exception as err:
-            _LOGGER.error("[MyElectrica] Eroare la actualizare: %s", err)
-            raise UpdateFailed(f"Eroare la actualizarea datelor: {err}") from err
-
-        data: dict[str, Any] = {
-            "hierarchy": hierarchy,
-            "client_data": client_data,
-            "invoices": invoices,
-            "payments": payments,
-            "contract_details": contract_details,
-            "meter_list": meter_list,
-            "readings": readings,
-            "convention": convention,
-            "nlc_to_client": nlc_to_client,
-            "nlc_to_contract_account": nlc_to_contract_account,
-        }
+        self._schedule_failed_retry()
 
-        _LOGGER.debug("[MyElectrica] Actualizare completă")
+        if due and not succeeded:
+            raise UpdateFailed(
+                "Eroare la actualizarea datelor: toate domeniile au eșuat"
+            )
+
+        self._publish_hierarchy(data)
+        self._attach_derived(data)
+        self._schedule_snapshot_save()
+
+        self.last_refresh_duration = round(time.monotonic() - refresh_start, 3)
+        _LOGGER.debug(
+            "[MyElectrica] Actualizare completă în %.2f s (domenii: %s)",
+            self.last_refresh_duration,
+            ", ".join(succeeded) or "—",
+        )
         return data
+
+
+class ChangeAwareEntity(CoordinatorEntity[MyElectricaCoordinator]):
+    """
+    Entitate care scrie starea doar când intrările ei s-au schimbat.
+
+    `_inputs` enumeră perechile (bucket, proprietar) citite de entitate,
+    proprietarul fiind "nlc" sau "client".  Semnătura = disponibilitate +
+    amprenta ierarhiei + amprentele intrărilor; dacă este identică cu cea
+    de la ultima scriere, actualizarea este omisă.  `_inputs = None`
+    înseamnă „scrie mereu".
+    """
+
+    _ctx: Any
+    _inputs: tuple[tuple[str, str], ...] | None = None
+    _last_signature: tuple | None = None
+
+    def _input_keys(self) -> list[tuple[str, str]]:
+        """Perechile (bucket, cheie) citite de entitate."""
+        return [
+            (bucket, self._ctx.nlc if owner == "nlc" else self._ctx.client_code)
+            for bucket, owner in self._inputs or ()
+        ]
+
+    @property
+    def available(self) -> bool:
+        """
+        Disponibilă cât timp intrările ei există în coordinator.data.
+
+        Un refresh eșuat (ex. backend căzut la pornire) nu ascunde datele
+        restaurate din snapshot sau ultima valoare bună — acestea rămân
+        afișate, marcate ca învechite (vezi `_stale_attributes`).
+        """
+        if super().available:
+            return True
+        data = self.coordinator.data
+        if not data:
+            return False
+        return all(
+            key in (data.get(bucket) or {}) for bucket, key in self._input_keys()
+        )
+
+    def _stale_since(self) -> float | None:
+        """Cea mai veche valoare învechită dintre intrări (epoch) sau None."""
+        return min(
+            (
+                since
+                for bucket, key in self._input_keys()
+                if (since := self.coordinator.stale_since(bucket, key))
+                is not None
+            ),
+            default=None,
+        )
+
+    def _stale_attributes(self) -> dict[str, str]:
+        """Atributul „Date învechite din", doar când există date învechite."""
+        since = self._stale_since()
+        if since is None:
+            return {}
+        return {
+            "Date învechite din": dt_util.as_local(
+                dt_util.utc_from_timestamp(since)
+            ).isoformat(timespec="seconds")
+        }
+
+    def _input_signature(self) -> tuple:
+        coordinator = self.coordinator
+        return (
+            self.available,
+            coordinator.hierarchy_fingerprint,
+            self._stale_since(),
+            *(
+                coordinator.content_hash(bucket, key)
+                for bucket, key in self._input_keys()
+            ),
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        stats = self.coordinator.write_stats
+        if self._inputs is not None:
+            signature = self._input_signature()
+            if signature == self._last_signature:
+                stats["omise"] += 1
+                return
+            self._last_signature = signature
+        stats["efectuate"] += 1
+        self.async_write_ha_state()
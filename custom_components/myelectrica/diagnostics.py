@@ -3,7 +3,7 @@ Diagnosticare pentru integrarea MyElectrica România.
 
 Exportă informații de diagnostic pentru support tickets:
 - Licență (fingerprint, status, cheie mascată)
-- Coordinator și date statistice
+- Coordinator și date statistice (inclusiv timpi per endpoint)
 - Starea senzorilor
 
 Datele sensibile (parolă, token-uri) sunt excluse.
@@ -11,6 +11,7 @@ Datele sensibile (parolă, token-uri) sunt excluse.
 
 from __future__ import annotations
 
+import time
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
@@ -43,6 +44,29 @@ async def async_get_config_entry_diagnostics(
     if coordinator:
         coordinator_info = {
             "last_update_success": coordinator.last_update_success,
+            "durata_ultimului_refresh_s": coordinator.last_refresh_duration,
+            "timpi_endpoint_ms": coordinator.endpoint_timings,
+            "token": coordinator.api.token_info,
+            "cache": coordinator.api.cache.stats,
+            "reincercari_api": coordinator.api.retry_stats,
+            "circuit_breakers": coordinator.api.breaker_states,
+            "rate_limiter": (
+                coordinator.api.rate_limiter.info
+                if coordinator.api.rate_limiter
+                else None
+            ),
+            "istoric_facturare": coordinator.billing_summary,
+            "programare": coordinator.schedule_info,
+            "ierarhie": coordinator.hierarchy_info,
+            "domenii": coordinator.domain_status,
+            "date_invechite": coordinator.stale_summary,
+            "scrieri_stare": coordinator.write_stats,
+            "memorie": coordinator.memory_footprint,
+            "snapshot_restaurat_acum_s": (
+                round(time.time() - coordinator.restored_at)
+                if coordinator.restored_at
+                else None
+            ),
         }
         if coordinator.data:
             hierarchy = coordinator.data.get("hierarchy", [])
@@ -3,16 +3,21 @@ Funcții utilitare pentru integrarea MyElectrica România.
 
 Conține:
   - Formatare valută (RON) în format românesc
-  - Formatare date în limba română
+  - Parsare și formatare date în limba română
   - Conversie sigură la float
   - Extragere body.response din răspunsurile API
+  - Detectare facturi neachitate
   - Construire adresă citibilă din datele LocConsum
   - Mapping județe România (cod → nume complet)
+  - Măsurarea memoriei ocupate de date (diagnostics)
 """
 
-from datetime import datetime
+import sys
+from collections.abc import Mapping
+from datetime import date, datetime
+from typing import Any
 
-from .const import MONTHS_EN_RO, MONTHS_NUM_RO
+from .const import MONTHS_NUM_RO
 
 
 # ── Mapping județe România ──────────────────────
@@ -75,14 +80,21 @@ def format_ron(value: float) -> str:
 # ── Formatare date ──────────────────────────────
 
 
-def format_date_ro(date_str: str) -> str:
-    """Formatează o dată ISO ca '5 ianuarie 2025'."""
+def parse_date(value: str | None) -> date | None:
+    """Parsează o dată ISO (YYYY-MM-DD); None dacă lipsește / e invalidă."""
     try:
-        parsed = datetime.strptime(date_str, "%Y-%m-%d")
-        month = MONTHS_EN_RO.get(parsed.strftime("%B"), "necunoscut")
-        return f"{parsed.day} {month} {parsed.year}"
+        return datetime.strptime(value, "%Y-%m-%d").date()
     except (ValueError, TypeError):
+        return None
+
+
+def format_date_ro(value: str | date | None) -> str:
+    """Formatează o dată (ISO sau deja parsată) ca '5 ianuarie 2025'."""
+    parsed = value if isinstance(value, date) else parse_date(value)
+    if parsed is None:
         return "Necunoscut"
+    month = MONTHS_NUM_RO.get(f"{parsed.month:02d}", "necunoscut")
+    return f"{parsed.day} {month} {parsed.year}"
 
 
 # ── Conversie sigură la float ───────────────────
@@ -116,6 +128,17 @@ def get_body_response(raw: dict | list | None):
     return None
 
 
+# ── Facturi neachitate ──────────────────────────
+
+
+def is_unpaid_invoice(invoice: dict) -> bool:
+    """Factura este neachitată (status neachitat și rest de plată > 0)."""
+    status = (invoice.get("InvoiceStatus") or "").lower()
+    if status not in ("neachitat", "neachitata", "neplătit"):
+        return False
+    return safe_float(invoice.get("UnpaidValue")) > 0
+
+
 # ── Mapping județ ───────────────────────────────
 
 
@@ -246,3 +269,36 @@ def client_type_friendly(code: str) -> str:
     if not code:
         return "Necunoscut"
     return CLIENT_TYPE_FRIENDLY.get(code.upper().strip(), code)
+
+
+# ── Măsurare memorie ────────────────────────────
+def deep_sizeof(obj: Any, seen: set[int] | None = None) -> int:
+    """
+    Dimensiunea aproximativă (octeți) a unui obiect și a tot ce conține.
+
+    Parcurge dict-uri (inclusiv MappingProxyType), liste, tupluri, seturi
+    și obiecte cu __slots__; obiectele partajate sunt numărate o singură
+    dată (și între apeluri, dacă se transmite același `seen`).
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, int, float, bool)) or item is None:
+            continue
+        if isinstance(item, Mapping):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            for slot in getattr(type(item), "__slots__", ()):
+                if hasattr(item, slot):
+                    stack.append(getattr(item, slot))
+    return total
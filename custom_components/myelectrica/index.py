@@ -0,0 +1,92 @@
+"""
+Index NLC pentru integrarea MyElectrica România.
+
+Ierarhia contului (client → contract → NLC) este parcursă o singură
+dată, la fiecare schimbare a ei, într-un index imutabil:
+  - nlc → LocConsum (dict-ul brut din ierarhie)
+  - nlc → cod client / cont contract
+  - cod client → NLC-uri, cod client → nume client
+
+Entitățile și platformele citesc indexul în O(1), în loc să parcurgă
+ierarhia la fiecare acces.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+@dataclass(frozen=True, slots=True)
+class NlcIndex:
+    """Index imutabil al NLC-urilor selectate, construit din ierarhie."""
+
+    # NLC-urile selectate, în ordinea din ierarhie
+    nlcs: tuple[str, ...] = ()
+    # Codurile client care au cel puțin un NLC selectat
+    client_codes: tuple[str, ...] = ()
+    locs: Mapping[str, Mapping[str, Any]] = field(default=_EMPTY)
+    nlc_client: Mapping[str, str] = field(default=_EMPTY)
+    nlc_contract: Mapping[str, str] = field(default=_EMPTY)
+    client_nlcs: Mapping[str, tuple[str, ...]] = field(default=_EMPTY)
+    client_names: Mapping[str, str] = field(default=_EMPTY)
+
+    @classmethod
+    def build(
+        cls,
+        hierarchy: list[dict],
+        selected_nlcs: list[str] | None = None,
+    ) -> NlcIndex:
+        """
+        Construiește indexul dintr-o ierarhie.
+
+        Dacă selected_nlcs este furnizat, păstrează doar NLC-urile din listă;
+        codurile client rămân doar cele cu cel puțin un NLC selectat.
+        """
+        selected = set(selected_nlcs) if selected_nlcs else None
+        locs: dict[str, Mapping[str, Any]] = {}
+        nlc_client: dict[str, str] = {}
+        nlc_contract: dict[str, str] = {}
+        client_nlcs: dict[str, list[str]] = {}
+        client_names: dict[str, str] = {}
+
+        for client in hierarchy:
+            cc = client.get("ClientCode", "")
+
+            for contract in client.get("to_ContContract", []):
+                ca = contract.get("ContractAccount", "")
+                for loc in contract.get("to_LocConsum", []):
+                    nlc = loc.get("IdLocConsum", "")
+                    if not nlc or nlc in locs:
+                        continue
+
+                    # Filtrare: dacă avem selecție, doar NLC-urile selectate
+                    if selected is not None and nlc not in selected:
+                        continue
+
+                    locs[nlc] = MappingProxyType(loc)
+                    nlc_client[nlc] = cc
+                    nlc_contract[nlc] = ca
+                    client_names[cc] = client.get("ClientName", "")
+                    if cc:
+                        client_nlcs.setdefault(cc, []).append(nlc)
+
+        return cls(
+            nlcs=tuple(locs),
+            client_codes=tuple(client_nlcs),
+            locs=MappingProxyType(locs),
+            nlc_client=MappingProxyType(nlc_client),
+            nlc_contract=MappingProxyType(nlc_contract),
+            client_nlcs=MappingProxyType(
+                {cc: tuple(nlcs) for cc, nlcs in client_nlcs.items()}
+            ),
+            client_names=MappingProxyType(client_names),
+        )
+
+    def loc(self, nlc: str) -> Mapping[str, Any] | None:
+        """LocConsum-ul unui NLC (sau None)."""
+        return self.locs.get(nlc)
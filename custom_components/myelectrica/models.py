@@ -0,0 +1,310 @@
+"""
+Modelul de date normalizat pentru integrarea MyElectrica România.
+
+API-ul returnează toate valorile ca string-uri (sume, cantități, date
+`YYYY-MM-DD`), împachetate în `{status, httpCode, body: {response}}`.
+Coordinator-ul convertește răspunsurile o singură dată per refresh în
+înregistrări tipizate și compacte (dataclass-uri cu __slots__), pe care
+senzorii le citesc direct — fără `get_body_response`, `safe_float` sau
+`strptime` la fiecare acces.
+
+Valorile afișate ca atare (index, tip citire, cantitate convenție) își
+păstrează textul original, ca starea entităților să rămână identică;
+câmpurile text lipsă devin "".
+
+Retenție compactă: `compact_response` reduce un răspuns brut la câmpurile
+folosite de senzori și butoane (`RETAINED_FIELDS`), păstrând forma
+plicului, astfel încât cache-ul API, istoricul de facturare și
+`coordinator.data` să nu mai țină răspunsurile complete.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from .helper import (
+    get_body_response,
+    is_unpaid_invoice,
+    parse_date,
+    safe_float,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Invoice:
+    """Factură (4.1)."""
+
+    invoice_id: str
+    fiscal_number: str
+    contract_account: str
+    issue_date: date | None
+    due_date: date | None
+    total_amount: float
+    unpaid_value: float
+    unpaid: bool
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        """Cheile de corelare cu plățile (FiscalNumber, InvoiceID)."""
+        return tuple(k for k in (self.fiscal_number, self.invoice_id) if k)
+
+
+@dataclass(frozen=True, slots=True)
+class Payment:
+    """Plată (5.1)."""
+
+    invoice_id: str
+    fiscal_number: str
+    payment_date: date | None
+    paid_value: float
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        """Cheile de corelare cu facturile (FiscalNumber, InvoiceID)."""
+        return tuple(k for k in (self.fiscal_number, self.invoice_id) if k)
+
+
+@dataclass(frozen=True, slots=True)
+class Reading:
+    """Citire din istoricul contorului (7.1)."""
+
+    reading_date: date | None
+    index: str
+    reading_type: str
+    serie_contor: str
+    installation_date: date | None
+
+
+@dataclass(frozen=True, slots=True)
+class Register:
+    """Cadran (registru) al unui contor (6.1)."""
+
+    register_code: str
+    description: str
+    index: str | None
+    reading_type: str
+    reading_date: date | None
+    index_pac: str
+    reading_date_pac: date | None
+
+
+@dataclass(frozen=True, slots=True)
+class Meter:
+    """Contor cu cadranele lui (6.1)."""
+
+    serie_contor: str
+    registers: tuple[Register, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class MeterList:
+    """Lista de contoare a unui NLC, cu perioada de autocitire (6.1)."""
+
+    pac_indicator: str
+    start_pac: date | None
+    end_pac: date | None
+    meters: tuple[Meter, ...]
+
+    @property
+    def first_register(self) -> tuple[Meter | None, Register | None]:
+        """Primul contor și primul lui cadran (sau None)."""
+        if not self.meters:
+            return None, None
+        meter = self.meters[0]
+        return meter, (meter.registers[0] if meter.registers else None)
+
+
+@dataclass(frozen=True, slots=True)
+class ConventionMonth:
+    """O lună din convenția de consum (8.1)."""
+
+    month: str
+    quantity: float
+    quantity_text: str
+
+
+# ── Normalizare ─────────────────────────────────
+
+
+def _records(raw: Any) -> list[dict]:
+    response = get_body_response(raw)
+    return response if isinstance(response, list) else []
+
+
+def normalize_invoices(raw: Any) -> tuple[Invoice, ...]:
+    """Facturile unui cod client, în ordinea API (nereordonate)."""
+    return tuple(
+        Invoice(
+            invoice_id=item.get("InvoiceID", "") or "",
+            fiscal_number=item.get("FiscalNumber", "") or "",
+            contract_account=item.get("ContractAccount", "") or "",
+            issue_date=parse_date(item.get("IssueDate")),
+            due_date=parse_date(item.get("DueDate")),
+            total_amount=safe_float(item.get("TotalAmount")),
+            unpaid_value=safe_float(item.get("UnpaidValue")),
+            unpaid=is_unpaid_invoice(item),
+        )
+        for item in _records(raw)
+    )
+
+
+def normalize_payments(raw: Any) -> tuple[Payment, ...]:
+    """Plățile unui cod client, în ordinea API."""
+    return tuple(
+        Payment(
+            invoice_id=item.get("InvoiceID", "") or "",
+            fiscal_number=item.get("FiscalNumber", "") or "",
+            payment_date=parse_date(item.get("PaymentDate")),
+            paid_value=safe_float(item.get("PaidValue")),
+        )
+        for item in _records(raw)
+    )
+
+
+def normalize_readings(raw: Any) -> tuple[Reading, ...]:
+    """Istoricul de citiri al unui NLC, în ordinea API."""
+    return tuple(
+        Reading(
+            reading_date=parse_date(item.get("ReadingDate")),
+            index=item.get("Index", "") or "",
+            reading_type=item.get("MeterReadingType", "") or "",
+            serie_contor=item.get("SerieContor", "") or "",
+            installation_date=parse_date(item.get("InstallationDate")),
+        )
+        for item in _records(raw)
+    )
+
+
+def normalize_meter_list(raw: Any) -> MeterList | None:
+    """Lista de contoare a unui NLC (None dacă răspunsul lipsește)."""
+    response = get_body_response(raw)
+    if not response or not isinstance(response, dict):
+        return None
+    return MeterList(
+        pac_indicator=response.get("PACIndicator", "") or "",
+        start_pac=parse_date(response.get("StartDatePAC")),
+        end_pac=parse_date(response.get("EndDatePAC")),
+        meters=tuple(
+            Meter(
+                serie_contor=meter.get("SerieContor", "") or "",
+                registers=tuple(
+                    Register(
+                        register_code=cadran.get("RegisterCode", "") or "",
+                        description=(
+                            cadran.get("RegisterDescription", "") or ""
+                        ),
+                        index=cadran.get("Index"),
+                        reading_type=(
+                            cadran.get("MeterReadingType", "") or ""
+                        ),
+                        reading_date=parse_date(cadran.get("ReadingDate")),
+                        index_pac=cadran.get("IndexPAC", "") or "",
+                        reading_date_pac=parse_date(
+                            cadran.get("ReadingDatePAC")
+                        ),
+                    )
+                    for cadran in meter.get("to_Cadran", [])
+                ),
+            )
+            for meter in response.get("to_Contor", [])
+        ),
+    )
+
+
+def normalize_convention(raw: Any) -> tuple[ConventionMonth, ...]:
+    """Convenția de consum a unui NLC, lună cu lună."""
+    return tuple(
+        ConventionMonth(
+            month=item.get("Month", "") or "",
+            quantity=safe_float(item.get("Quantity")),
+            quantity_text=item.get("Quantity", "0"),
+        )
+        for item in _records(raw)
+    )
+
+
+# Bucket → funcția de normalizare (cheia rezultatului rămâne aceeași)
+NORMALIZERS: dict[str, Any] = {
+    "invoices": normalize_invoices,
+    "payments": normalize_payments,
+    "readings": normalize_readings,
+    "meter_list": normalize_meter_list,
+    "convention": normalize_convention,
+}
+
+
+# ── Retenție compactă ───────────────────────────
+
+# Adresa (client_data) — câmpurile citite de build_address_consum
+_ADDRESS_FIELDS = (
+    "Street", "HouseNumber", "Building", "Entrance", "Floor",
+    "RoomNumber", "City", "PostCode", "Region",
+)
+
+# Endpoint → câmpurile păstrate.  O listă descrie un dict; un tuplu
+# (câmp, specificație) coboară într-o listă de sub-înregistrări.
+RETAINED_FIELDS: dict[str, tuple] = {
+    "client_data": ("ClientName", "ClientType", "Telephone", *_ADDRESS_FIELDS),
+    "contract_details": (
+        "ContractStatus", "ProductName", "ContractType", "ContractDate",
+        "EstimationMethod", "PACIndicator", "PeriodicitateCitiri",
+        "RegionGroup",
+    ),
+    "invoices": (
+        "InvoiceID", "FiscalNumber", "ContractAccount", "IssueDate",
+        "DueDate", "TotalAmount", "UnpaidValue", "InvoiceStatus",
+    ),
+    "payments": ("InvoiceID", "FiscalNumber", "PaymentDate", "PaidValue"),
+    "meter_list": (
+        "PACIndicator", "StartDatePAC", "EndDatePAC",
+        ("to_Contor", (
+            "SerieContor",
+            ("to_Cadran", (
+                "RegisterCode", "RegisterDescription", "Index",
+                "MeterReadingType", "ReadingDate", "IndexPAC",
+                "ReadingDatePAC",
+            )),
+        )),
+    ),
+    "readings": (
+        "ReadingDate", "Index", "MeterReadingType", "SerieContor",
+        "InstallationDate",
+    ),
+    "convention": ("Month", "Quantity"),
+}
+
+
+def _trim(record: Any, spec: tuple) -> Any:
+    """Păstrează dintr-un dict (sau listă de dict-uri) doar câmpurile din spec."""
+    if isinstance(record, list):
+        return [_trim(item, spec) for item in record]
+    if not isinstance(record, dict):
+        return record
+    out: dict[str, Any] = {}
+    for item in spec:
+        if isinstance(item, tuple):
+            name, sub_spec = item
+            if name in record:
+                out[name] = _trim(record[name], sub_spec)
+        elif item in record:
+            out[item] = record[item]
+    return out
+
+
+def compact_response(endpoint: str | None, raw: Any) -> Any:
+    """
+    Răspunsul redus la câmpurile folosite (forma plicului se păstrează).
+
+    Endpoint-urile fără specificație (ex. ierarhia) rămân neschimbate.
+    """
+    spec = RETAINED_FIELDS.get(endpoint or "")
+    if spec is None or raw is None:
+        return raw
+    if isinstance(raw, list):
+        return _trim(raw, spec)
+    body = raw.get("body") if isinstance(raw, dict) else None
+    if not isinstance(body, dict) or "response" not in body:
+        return raw
+    return {**raw, "body": {**body, "response": _trim(body["response"], spec)}}
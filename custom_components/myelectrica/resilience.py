@@ -0,0 +1,374 @@
+"""
+Mecanisme de reziliență pentru API-ul MyElectrica România.
+
+RetryPolicy — reîncercări pentru erori tranzitorii (5xx, 429, timeout,
+erori de conexiune), cu backoff exponențial și jitter:
+  - întârzierea = aleator în [0, min(max_delay, base_delay · 2^(n−1))]
+  - antetul Retry-After este respectat; dacă cere o pauză mai lungă
+    decât `max_delay`, renunțăm în loc să ținem request-ul blocat
+  - request-urile neidempotente (ex. trimiterea indexului) sunt
+    reluate doar când serverul sigur nu le-a procesat
+
+CircuitBreaker — oprește request-urile către o familie de endpoint-uri
+cât timp backend-ul este căzut:
+  - closed:    request-urile trec; eșecurile consecutive sunt numărate
+  - open:      request-urile eșuează imediat (fără socket, fără timeout)
+  - half-open: după pauză, un singur request de probă; succes → closed,
+               eșec → open din nou, cu pauza dublată
+
+TokenBucketLimiter — limitează ritmul request-urilor către API, comun
+tuturor conturilor configurate: `rate` request-uri/secundă în regim
+constant, cu rafale de cel mult `burst`; request-urile în exces așteaptă
+la coadă (FIFO).  Cu `rate` = 0 limiter-ul doar numără request-urile.
+
+ConcurrencyLimit — semafor a cărui limită poate fi schimbată cât timp
+request-uri sunt în curs: cele deja pornite sunt numărate în noua limită.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+from .const import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_MAX_RECOVERY,
+    BREAKER_RECOVERY_TIMEOUT,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_PER_SECOND,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_DELAY,
+)
+
+# Statusuri HTTP considerate tranzitorii
+RETRYABLE_STATUSES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+
+class RetryableError(Exception):
+    """Eroare tranzitorie — request-ul poate fi reluat."""
+
+    def __init__(
+        self,
+        reason: str,
+        retry_after: float | None = None,
+        not_processed: bool = False,
+    ) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+        # True dacă serverul sigur nu a procesat request-ul
+        # (conexiune refuzată, 429) — reluarea e sigură și pentru POST
+        self.not_processed = not_processed
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """Politica de reîncercare pentru erorile tranzitorii."""
+
+    max_attempts: int = RETRY_MAX_ATTEMPTS
+    base_delay: float = RETRY_BASE_DELAY
+    max_delay: float = RETRY_MAX_DELAY
+
+    def should_retry(
+        self, attempt: int, error: RetryableError, idempotent: bool
+    ) -> bool:
+        """Decide dacă încercarea `attempt` (1-based) poate fi reluată."""
+        if attempt >= self.max_attempts:
+            return False
+        if not idempotent and not error.not_processed:
+            return False
+        return error.retry_after is None or error.retry_after <= self.max_delay
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """Pauza înaintea reîncercării (full jitter, minim Retry-After)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Interpretează antetul Retry-After (secunde sau dată HTTP)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass(frozen=True, slots=True)
+class BreakerPermit:
+    """Permisiunea dată de `CircuitBreaker.allow` unui request."""
+
+    # True doar pentru request-ul de probă din half-open
+    probe: bool
+    # Generația circuitului la emitere (crește la fiecare deschidere)
+    generation: int
+
+
+class CircuitBreaker:
+    """Circuit breaker pentru o familie de endpoint-uri."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout: float = BREAKER_RECOVERY_TIMEOUT,
+        max_recovery: float = BREAKER_MAX_RECOVERY,
+    ) -> None:
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._base_recovery = recovery_timeout
+        self._max_recovery = max_recovery
+        self._recovery = recovery_timeout
+
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._generation = 0
+        self.rejected = 0
+        self.trips = 0
+
+    def allow(self) -> BreakerPermit | None:
+        """
+        Permisiunea pentru un request (None = respins).
+
+        În half-open, doar un singur request primește permisiunea de
+        probă; doar rezultatul lui schimbă starea circuitului.
+        """
+        if self.state == self.CLOSED:
+            return BreakerPermit(probe=False, generation=self._generation)
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self._recovery:
+                self.rejected += 1
+                return None
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self._probe_in_flight:
+            self.rejected += 1
+            return None
+        self._probe_in_flight = True
+        return BreakerPermit(probe=True, generation=self._generation)
+
+    def _is_current(self, permit: BreakerPermit) -> bool:
+        """
+        True dacă rezultatul request-ului poate schimba starea.
+
+        Un request pornit cu circuitul închis, care se termină după ce
+        acesta s-a deschis între timp, nu mai contează.
+        """
+        if permit.probe:
+            return self.state == self.HALF_OPEN and self._probe_in_flight
+        return self.state == self.CLOSED and permit.generation == self._generation
+
+    def record_success(self, permit: BreakerPermit) -> None:
+        """Backend-ul a răspuns — închidem circuitul."""
+        if not self._is_current(permit):
+            return
+        self.state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+        self._recovery = self._base_recovery
+
+    def record_failure(self, permit: BreakerPermit) -> None:
+        """Eșec tranzitoriu final (după reîncercări)."""
+        if not self._is_current(permit):
+            return
+        if permit.probe:
+            # Probe eșuat — redeschidem, cu pauză dublată
+            self._recovery = min(self._recovery * 2, self._max_recovery)
+            self._trip()
+            return
+        self._failures += 1
+        if self._failures >= self._failure_threshold:
+            self._trip()
+
+    def release(self, permit: BreakerPermit) -> None:
+        """Request abandonat (ex. anulat) — eliberează probe-ul, fără verdict."""
+        if permit.probe and self._is_current(permit):
+            self._probe_in_flight = False
+
+    def _trip(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._generation += 1
+        self.trips += 1
+
+    @property
+    def info(self) -> dict[str, Any]:
+        """Starea pentru diagnostics."""
+        info: dict[str, Any] = {
+            "stare": self.state,
+            "esecuri_consecutive": self._failures,
+            "deschideri": self.trips,
+            "respinse": self.rejected,
+        }
+        if self.state == self.OPEN:
+            info["probe_in_s"] = max(
+                round(self._recovery - (time.monotonic() - self._opened_at)), 0
+            )
+        return info
+
+
+class TokenBucketLimiter:
+    """Token bucket partajat, cu metrici de coadă."""
+
+    def __init__(
+        self,
+        rate: float = RATE_LIMIT_PER_SECOND,
+        burst: int = RATE_LIMIT_BURST,
+    ) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        # asyncio.Lock servește așteptătorii în ordinea sosirii
+        self._lock = asyncio.Lock()
+
+        self._queued = 0
+        self.max_queued = 0
+        self.acquired = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def configure(self, rate: float, burst: int) -> None:
+        """Setează rata (0 = fără limită) / rafala (invalidă = ignorată)."""
+        self._refill()
+        if rate >= 0:
+            self._rate = float(rate)
+        if burst >= 1:
+            self._burst = int(burst)
+            self._tokens = min(self._tokens, self._burst)
+
+    @property
+    def enabled(self) -> bool:
+        """True dacă ritmul este limitat."""
+        return self._rate > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Așteaptă până când un request poate pleca."""
+        if not self.enabled:
+            self.acquired += 1
+            return
+        self._queued += 1
+        self.max_queued = max(self.max_queued, self._queued)
+        try:
+            async with self._lock:
+                self._refill()
+                if self._tokens < 1:
+                    wait = (1 - self._tokens) / self._rate
+                    self.delayed += 1
+                    self.total_wait += wait
+                    self.max_wait = max(self.max_wait, wait)
+                    await asyncio.sleep(wait)
+                    self._refill()
+                self._tokens -= 1
+                self.acquired += 1
+        finally:
+            self._queued -= 1
+
+    @property
+    def info(self) -> dict[str, Any]:
+        """Metrici pentru diagnostics."""
+        return {
+            "activ": self.enabled,
+            "rata_pe_secunda": self._rate,
+            "rafala": self._burst,
+            "request_uri": self.acquired,
+            "intarziate": self.delayed,
+            "asteptare_totala_s": round(self.total_wait, 2),
+            "asteptare_maxima_s": round(self.max_wait, 2),
+            "coada_curenta": self._queued,
+            "coada_maxima": self.max_queued,
+        }
+
+
+class ConcurrencyLimit:
+    """Limită de request-uri simultane, redimensionabilă pe loc."""
+
+    def __init__(self, limit: int) -> None:
+        self._limit = max(1, int(limit))
+        self._active = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def limit(self) -> int:
+        """Numărul maxim de request-uri simultane."""
+        return self._limit
+
+    def resize(self, limit: int) -> None:
+        """
+        Schimbă limita.  O limită mai mică nu întrerupe request-urile
+        în curs, dar noile request-uri așteaptă până când acestea scad sub ea.
+        """
+        self._limit = max(1, int(limit))
+        self._wake()
+
+    def _wake(self) -> None:
+        free = self._limit - self._active
+        for waiter in self._waiters:
+            if free <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def acquire(self) -> None:
+        """Așteaptă un loc liber (ordinea sosirii)."""
+        while self._active >= self._limit or (
+            self._waiters and not self._waiters[0].done()
+        ):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                self._waiters.remove(waiter)
+                if waiter.done() and not waiter.cancelled():
+                    # Locul primit, dar abandonat — îl dăm următorului
+                    self._wake()
+                raise
+            self._waiters.remove(waiter)
+            if self._active < self._limit:
+                break
+        self._active += 1
+
+    def release(self) -> None:
+        """Eliberează locul unui request încheiat."""
+        self._active -= 1
+        self._wake()
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.release()
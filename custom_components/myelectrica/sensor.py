@@ -12,22 +12,39 @@ fiecare cu 9 senzori:
   7. Arhivă facturi     (4.1)
   8. Factură restantă   (4.1 filtrat)
   9. Arhivă plăți       (5.1)
+
+Plus un device de cont per intrare, cu senzorul de diagnostic
+„Următoarea actualizare" (programarea coordinator-ului).
 """
 
 import logging
-from datetime import datetime
+from collections.abc import Callable, Mapping
+from functools import wraps
+from typing import Any
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import entity_registry as er
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.util import dt as dt_util
-
-from .const import ATTRIBUTION, DOMAIN, LICENSE_DATA_KEY, MONTHS_NUM_RO
-from .coordinator import MyElectricaCoordinator
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import (
+    ATTRIBUTION,
+    DOMAIN,
+    LICENSE_DATA_KEY,
+    MONTHS_NUM_RO,
+    SIGNAL_HIERARCHY_CHANGED,
+)
+from .billing import EMPTY_BILLING_VIEW, BillingView
+from .coordinator import (
+    ChangeAwareEntity,
+    HierarchyChange,
+    MyElectricaCoordinator,
+)
 from .helper import (
     build_address,
     build_address_consum,
@@ -35,9 +52,18 @@ from .helper import (
     format_ron,
     get_body_response,
     get_judet,
-    safe_float,
     client_type_friendly,
 )
+from .index import NlcIndex
+from .models import (
+    ConventionMonth,
+    Invoice,
+    Meter,
+    MeterList,
+    Payment,
+    Reading,
+    Register,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -56,19 +82,18 @@ async def async_setup_entry(
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Configurează senzorii pe baza ierarhiei descoperite."""
+    """Configurează senzorii pe baza ierarhiei descoperite.
+
+    Platforma rămâne abonată la SIGNAL_HIERARCHY_CHANGED: NLC-urile noi
+    primesc senzori, iar cele dispărute își pierd entitățile și device-ul,
+    fără reîncărcarea intrării.
+    """
     coordinator: MyElectricaCoordinator = config_entry.runtime_data
 
     if not coordinator.data:
         _LOGGER.warning("[MyElectrica] Coordinator fără date la setup")
         return
 
-    hierarchy = coordinator.data.get("hierarchy", [])
-    sensors: list[SensorEntity] = []
-
-    # NLC-urile selectate de utilizator (dacă există)
-    selected_nlcs = config_entry.data.get("selected_nlcs")
-
     # Verifică dacă licența este validă
     license_valid = _is_license_valid(hass)
 
@@ -88,70 +113,118 @@ async def async_setup_entry(
                     entry_reg.entity_id,
                 )
 
-    # Iterăm ierarhia: client → contract → NLC
-    for client in hierarchy:
-        client_code = client.get("ClientCode", "")
-        client_name = client.get("ClientName", "")
+    # Senzorii creați, per NLC
+    known: dict[str, list[SensorEntity]] = {}
 
-        for contract in client.get("to_ContContract", []):
-            contract_account = contract.get("ContractAccount", "")
+    def _sensors_for(ctx: NlcContext) -> list[SensorEntity]:
+        # Dacă licența nu este validă, adaugă doar LicentaNecesaraSensor
+        if not license_valid:
+            return [LicentaNecesaraSensor(coordinator, config_entry, ctx)]
 
-            for loc in contract.get("to_LocConsum", []):
-                nlc = loc.get("IdLocConsum", "")
-                if not nlc:
-                    continue
-
-                # Filtrare: doar NLC-urile selectate
-                if selected_nlcs and nlc not in selected_nlcs:
-                    continue
+        # Curăță senzorul de licență orfan (dacă exista anterior)
+        registru = er.async_get(hass)
+        licenta_uid = f"{DOMAIN}_{ctx.nlc}_licenta_necesara"
+        entitate_licenta = registru.async_get_entity_id(
+            "sensor", DOMAIN, licenta_uid
+        )
+        if entitate_licenta is not None:
+            registru.async_remove(entitate_licenta)
+            _LOGGER.debug(
+                "[MyElectrica] Entitate LicentaNecesaraSensor orfană "
+                "eliminată: %s",
+                entitate_licenta,
+            )
 
-                address = build_address(loc)
+        return [
+            ContractNlcSensor(coordinator, config_entry, ctx),
+            ClientDataSensor(coordinator, config_entry, ctx),
+            IndexCurentSensor(coordinator, config_entry, ctx),
+            IstoricCitiriSensor(coordinator, config_entry, ctx),
+            CitirePermisaSensor(coordinator, config_entry, ctx),
+            ConventieConsumSensor(coordinator, config_entry, ctx),
+            ArhivaFacturiSensor(coordinator, config_entry, ctx),
+            FacturaRestantaSensor(coordinator, config_entry, ctx),
+            ArhivaPlatiSensor(coordinator, config_entry, ctx),
+        ]
+
+    @callback
+    def _async_sync_entities(change: HierarchyChange | None = None) -> None:
+        """Aduce senzorii la zi cu NLC-urile din ierarhia curentă."""
+        contexts = build_nlc_contexts(coordinator.index)
+
+        sensors: list[SensorEntity] = []
+        for nlc, ctx in contexts.items():
+            if nlc not in known:
+                known[nlc] = _sensors_for(ctx)
+                sensors.extend(known[nlc])
+
+        removed = [nlc for nlc in known if nlc not in contexts]
+        if removed:
+            registru = er.async_get(hass)
+            for nlc in removed:
+                for entity in known.pop(nlc):
+                    entity_id = registru.async_get_entity_id(
+                        "sensor", DOMAIN, entity.unique_id
+                    )
+                    if entity_id is not None:
+                        registru.async_remove(entity_id)
+            _async_remove_nlc_devices(hass, config_entry, removed)
+
+        _LOGGER.debug(
+            "[MyElectrica] Se adaugă %s senzori, se elimină senzorii a %s "
+            "NLC-uri (entry_id=%s)",
+            len(sensors),
+            len(removed),
+            config_entry.entry_id,
+        )
+        if sensors:
+            async_add_entities(sensors)
 
-                ctx = NlcContext(
-                    nlc=nlc,
-                    client_code=client_code,
-                    client_name=client_name,
-                    contract_account=contract_account,
-                    address=address,
-                )
+    _async_sync_entities()
 
-                # Dacă licența nu este validă, adaugă doar LicentaNecesaraSensor
-                if not license_valid:
-                    sensors.append(LicentaNecesaraSensor(coordinator, config_entry, ctx))
-                else:
-                    # Curăță senzorul de licență orfan (dacă exista anterior)
-                    registru = er.async_get(hass)
-                    licenta_uid = f"{DOMAIN}_{ctx.nlc}_licenta_necesara"
-                    entitate_licenta = registru.async_get_entity_id(
-                        "sensor", DOMAIN, licenta_uid
-                    )
-                    if entitate_licenta is not None:
-                        registru.async_remove(entitate_licenta)
-                        _LOGGER.debug(
-                            "[MyElectrica] Entitate LicentaNecesaraSensor orfană "
-                            "eliminată: %s",
-                            entitate_licenta,
-                        )
+    # Senzorul de programare este unic per intrare (device-ul contului)
+    if license_valid:
+        async_add_entities([UrmatoareaActualizareSensor(coordinator, config_entry)])
 
-                    sensors.extend([
-                        ContractNlcSensor(coordinator, config_entry, ctx),
-                        ClientDataSensor(coordinator, config_entry, ctx),
-                        IndexCurentSensor(coordinator, config_entry, ctx),
-                        IstoricCitiriSensor(coordinator, config_entry, ctx),
-                        CitirePermisaSensor(coordinator, config_entry, ctx),
-                        ConventieConsumSensor(coordinator, config_entry, ctx),
-                        ArhivaFacturiSensor(coordinator, config_entry, ctx),
-                        FacturaRestantaSensor(coordinator, config_entry, ctx),
-                        ArhivaPlatiSensor(coordinator, config_entry, ctx),
-                    ])
-
-    _LOGGER.debug(
-        "[MyElectrica] Se adaugă %s senzori (entry_id=%s)",
-        len(sensors),
-        config_entry.entry_id,
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_HIERARCHY_CHANGED.format(entry_id=config_entry.entry_id),
+            _async_sync_entities,
+        )
     )
 
-    async_add_entities(sensors)
+
+def build_nlc_contexts(index: NlcIndex) -> dict[str, NlcContext]:
+    """Contextele NLC-urilor din index, în ordinea din ierarhie."""
+    contexts: dict[str, NlcContext] = {}
+    for nlc in index.nlcs:
+        client_code = index.nlc_client.get(nlc, "")
+        contexts[nlc] = NlcContext(
+            nlc=nlc,
+            client_code=client_code,
+            client_name=index.client_names.get(client_code, ""),
+            contract_account=index.nlc_contract.get(nlc, ""),
+            address=build_address(index.locs[nlc]),
+        )
+    return contexts
+
+
+@callback
+def _async_remove_nlc_devices(
+    hass: HomeAssistant, config_entry: ConfigEntry, nlcs: list[str]
+) -> None:
+    """Desprinde device-urile NLC-urilor eliminate de intrare."""
+    registru = dr.async_get(hass)
+    for nlc in nlcs:
+        device = registru.async_get_device(identifiers={(DOMAIN, nlc)})
+        if device is not None:
+            registru.async_update_device(
+                device.id, remove_config_entry_id=config_entry.entry_id
+            )
+            _LOGGER.debug(
+                "[MyElectrica] Device-ul NLC %s a fost eliminat", nlc
+            )
 
 
 # ── Context NLC (date partajate între senzori) ───
@@ -183,11 +256,39 @@ class NlcContext:
         self.address = address
 
 
+# ── Memorizare per actualizare ───────────────────
+
+
+def per_update(func: Callable[[Any], Any]) -> property:
+    """
+    Property calculată o singură dată per generație de date a coordinator-ului.
+
+    Valoarea se recalculează doar când coordinator-ul publică date noi,
+    când se schimbă starea licenței sau cheia suplimentară a entității
+    (`_memo_extra_key`, ex. data curentă pentru termene relative).
+    """
+    name = func.__name__
+
+    @wraps(func)
+    def getter(self: MyElectricaEntity) -> Any:
+        key = (
+            self.coordinator.generation,
+            self._license_valid,
+            self._memo_extra_key(),
+        )
+        cached = self._memo.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        value = func(self)
+        self._memo[name] = (key, value)
+        return value
+
+    return property(getter)
+
+
 # ── Clasă de bază ────────────────────────────────
 
-class MyElectricaEntity(
-    CoordinatorEntity[MyElectricaCoordinator], SensorEntity
-):
+class MyElectricaEntity(ChangeAwareEntity, SensorEntity):
     """Clasă de bază pentru entitățile MyElectrica România."""
 
     _attr_has_entity_name = False
@@ -201,6 +302,34 @@ class MyElectricaEntity(
         super().__init__(coordinator)
         self._config_entry = config_entry
         self._ctx = ctx
+        # Valori memorizate de @per_update: nume → (cheie, valoare)
+        self._memo: dict[str, tuple[tuple, Any]] = {}
+
+    def _memo_extra_key(self) -> Any:
+        """Cheie suplimentară de invalidare pentru @per_update."""
+        return None
+
+    def _input_signature(self) -> tuple:
+        """Semnătura intrărilor + licența + cheia suplimentară."""
+        return (
+            *super()._input_signature(),
+            self._license_valid,
+            self._memo_extra_key(),
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Atributele senzorului (`_attributes`) + marcajul datelor învechite."""
+        attrs = self._attributes
+        stale = self._stale_attributes()
+        if not stale:
+            return attrs
+        return {**(attrs or {}), **stale}
+
+    @property
+    def _attributes(self) -> dict[str, Any] | None:
+        """Atributele specifice senzorului (suprascrise în subclase)."""
+        return None
 
     @property
     def _license_valid(self) -> bool:
@@ -249,17 +378,22 @@ class MyElectricaEntity(
         raw = bucket.get(self._ctx.client_code)
         return get_body_response(raw)
 
-    def _get_loc_consum(self) -> dict | None:
-        """Caută LocConsum-ul curent (după NLC) în ierarhie."""
-        if not self.coordinator.data:
-            return None
-        hierarchy = self.coordinator.data.get("hierarchy", [])
-        for client in hierarchy:
-            for contract in client.get("to_ContContract", []):
-                for loc in contract.get("to_LocConsum", []):
-                    if loc.get("IdLocConsum") == self._ctx.nlc:
-                        return loc
-        return None
+    def _get_nlc_records(self, bucket: str) -> Any:
+        """Înregistrările normalizate (models.py) ale NLC-ului curent."""
+        records = (self.coordinator.data or {}).get("records") or {}
+        return (records.get(bucket) or {}).get(self._ctx.nlc)
+
+    def _get_billing_view(self) -> BillingView:
+        """Vederea de facturare a contului contract al NLC-ului curent."""
+        views = (self.coordinator.data or {}).get("billing_views") or {}
+        return views.get(
+            (self._ctx.client_code, self._ctx.contract_account),
+            EMPTY_BILLING_VIEW,
+        )
+
+    def _get_loc_consum(self) -> Mapping[str, Any] | None:
+        """LocConsum-ul curent (după NLC), din indexul coordinator-ului."""
+        return self.coordinator.index.loc(self._ctx.nlc)
 
 
 # ── Licență Necesară Sensor ────────────────────
@@ -269,6 +403,7 @@ class LicentaNecesaraSensor(MyElectricaEntity):
 
     _attr_icon = "mdi:license"
     _attr_translation_key = "licenta_necesara"
+    _inputs = ()
 
     def __init__(self, coordinator, config_entry, ctx: NlcContext) -> None:
         super().__init__(coordinator, config_entry, ctx)
@@ -298,6 +433,7 @@ class ContractNlcSensor(MyElectricaEntity):
 
     _attr_icon = "mdi:file-document-outline"
     _attr_translation_key = "date_contract"
+    _inputs = (("contract_details", "nlc"),)
 
     def __init__(self, coordinator, config_entry, ctx: NlcContext) -> None:
         super().__init__(coordinator, config_entry, ctx)
@@ -305,7 +441,7 @@ class ContractNlcSensor(MyElectricaEntity):
         self._attr_unique_id = f"{DOMAIN}_{ctx.nlc}_date_contract"
         self._custom_entity_id = f"sensor.{DOMAIN}_{ctx.nlc}_date_contract"
 
-    @property
+    @per_update
     def native_value(self):
         if not self._license_valid:
             return "Licență necesară"
@@ -315,8 +451,8 @@ class ContractNlcSensor(MyElectricaEntity):
         # Ia valoarea și pune prima literă mare
         return response.get("ContractStatus", "Necunoscut").capitalize()
 
-    @property
-    def extra_state_attributes(self):
+    @per_update
+    def _attributes(self):
         if not self._license_valid:
             return {"licență": "necesară"}
         response = self._get_nlc_response("contract_details")
@@ -370,6 +506,7 @@ class ClientDataSensor(MyElectricaEntity):
 
     _attr_icon = "mdi:account-circle"
     _attr_translation_key = "date_client"
+    _inputs = (("client_data", "client"),)
 
     def __init__(self, coordinator, config_entry, ctx: NlcContext) -> None:
         super().__init__(coordinator, config_entry, ctx)
@@ -377,7 +514,7 @@ class ClientDataSensor(MyElectricaEntity):
         self._attr_unique_id = f"{DOMAIN}_{ctx.nlc}_date_client"
         self._custom_entity_id = f"sensor.{DOMAIN}_{ctx.nlc}_date_client"
 
-    @property
+    @per_update
     def native_value(self):
         if not self._license_valid:
             return "Licență necesară"
@@ -386,8 +523,8 @@ class ClientDataSensor(MyElectricaEntity):
             return (self._ctx.client_name or "Necunoscut").title()
         return (response.get("ClientName", self._ctx.client_name or "Necunoscut")).title()
 
-    @property
-    def extra_state_attributes(self):
+    @per_update
+    def _attributes(self):
         if not self._license_valid:
             return {"licență": "necesară"}
         response = self._get_client_response("client_data")
@@ -415,6 +552,7 @@ class IndexCurentSensor(MyElectricaEntity):
 
     _attr_icon = "mdi:counter"
     _attr_translation_key = "index_curent"
+    _inputs = (("meter_list", "nlc"),)
 
     def __init__(self, coordinator, config_entry, ctx: NlcContext) -> None:
         super().__init__(coordinator, config_entry, ctx)
@@ -422,86 +560,64 @@ class IndexCurentSensor(MyElectricaEntity):
         self._attr_unique_id = f"{DOMAIN}_{ctx.nlc}_index_curent"
         self._custom_entity_id = f"sensor.{DOMAIN}_{ctx.nlc}_index_curent"
 
-    def _get_meter_data(self) -> tuple[dict | None, dict | None, dict | None]:
-        """Returnează (response, contor, cadran) sau (None, None, None)."""
-        response = self._get_nlc_response("meter_list")
-        if not response:
+    def _get_meter_data(
+        self,
+    ) -> tuple[MeterList | None, Meter | None, Register | None]:
+        """Returnează (listă contoare, contor, cadran) sau (None, None, None)."""
+        meter_list: MeterList | None = self._get_nlc_records("meter_list")
+        if meter_list is None:
             return None, None, None
+        meter, register = meter_list.first_register
+        return meter_list, meter, register
 
-        contoare = response.get("to_Contor", [])
-        if not contoare:
-            return response, None, None
-
-        contor = contoare[0]
-        cadrane = contor.get("to_Cadran", [])
-        if not cadrane:
-            return response, contor, None
-
-        return response, contor, cadrane[0]
-
-    @property
+    @per_update
     def native_value(self):
         if not self._license_valid:
             return "Licență necesară"
         _, _, cadran = self._get_meter_data()
         if cadran is None:
             return None
-        return cadran.get("Index")
+        return cadran.index
 
-    @property
-    def extra_state_attributes(self):
+    @per_update
+    def _attributes(self):
         if not self._license_valid:
             return {"licență": "necesară"}
-        response, contor, cadran = self._get_meter_data()
+        meter_list, contor, cadran = self._get_meter_data()
         if contor is None or cadran is None:
             return {"attribution": ATTRIBUTION}
 
         attrs = {
-            "Serie contor": contor.get("SerieContor", "Necunoscut"),
-            "Data citirii": format_date_ro(
-                cadran.get("ReadingDate", "")
-            ),
-            "Index validat": cadran.get("Index", "Necunoscut"),
-            "Tip citire": cadran.get("MeterReadingType", "Necunoscut"),
-            "Cod registru": cadran.get("RegisterCode", "Necunoscut"),
-            "Descriere registru": cadran.get(
-                "RegisterDescription", "Necunoscut"
-            ),
+            "Serie contor": contor.serie_contor or "Necunoscut",
+            "Data citirii": format_date_ro(cadran.reading_date),
+            "Index validat": cadran.index or "Necunoscut",
+            "Tip citire": cadran.reading_type or "Necunoscut",
+            "Cod registru": cadran.register_code or "Necunoscut",
+            "Descriere registru": cadran.description or "Necunoscut",
         }
 
         # Date PAC (autocitire)
-        index_pac = cadran.get("IndexPAC")
-        if index_pac:
-            attrs["Index PAC"] = index_pac
-            attrs["Data citire PAC"] = format_date_ro(
-                cadran.get("ReadingDatePAC", "")
-            )
+        if cadran.index_pac:
+            attrs["Index PAC"] = cadran.index_pac
+            attrs["Data citire PAC"] = format_date_ro(cadran.reading_date_pac)
 
-        if response:
-            pac = response.get("PACIndicator")
-            if pac == "true":
-                attrs["Perioadă autocitire început"] = format_date_ro(
-                    response.get("StartDatePAC", "")
-                )
-                attrs["Perioadă autocitire sfârșit"] = format_date_ro(
-                    response.get("EndDatePAC", "")
-                )
+        if meter_list.pac_indicator == "true":
+            attrs["Perioadă autocitire început"] = format_date_ro(
+                meter_list.start_pac
+            )
+            attrs["Perioadă autocitire sfârșit"] = format_date_ro(
+                meter_list.end_pac
+            )
 
         # Cadrane adiționale (dacă sunt mai multe)
-        all_contoare = (response or {}).get("to_Contor", [])
-        for c_idx, cnt in enumerate(all_contoare):
-            cadrane = cnt.get("to_Cadran", [])
-            for d_idx, cdr in enumerate(cadrane):
+        for c_idx, cnt in enumerate(meter_list.meters):
+            for d_idx, cdr in enumerate(cnt.registers):
                 if c_idx == 0 and d_idx == 0:
                     continue  # deja afișat mai sus
                 prefix = f"Contor {c_idx + 1} cadran {d_idx + 1}"
-                attrs[f"{prefix} index"] = cdr.get("Index", "Necunoscut")
-                attrs[f"{prefix} tip"] = cdr.get(
-                    "MeterReadingType", "Necunoscut"
-                )
-                attrs[f"{prefix} dată"] = format_date_ro(
-                    cdr.get("ReadingDate", "")
-                )
+                attrs[f"{prefix} index"] = cdr.index or "Necunoscut"
+                attrs[f"{prefix} tip"] = cdr.reading_type or "Necunoscut"
+                attrs[f"{prefix} dată"] = format_date_ro(cdr.reading_date)
 
         attrs["attribution"] = ATTRIBUTION
         return attrs
@@ -514,6 +630,7 @@ class IstoricCitiriSensor(MyElectricaEntity):
 
     _attr_icon = "mdi:history"
     _attr_translation_key = "istoric_citiri"
+    _inputs = (("readings", "nlc"),)
 
     def __init__(self, coordinator, config_entry, ctx: NlcContext) -> None:
         super().__init__(coordinator, config_entry, ctx)
@@ -521,24 +638,21 @@ class IstoricCitiriSensor(MyElectricaEntity):
         self._attr_unique_id = f"{DOMAIN}_{ctx.nlc}_istoric_citiri"
         self._custom_entity_id = f"sensor.{DOMAIN}_{ctx.nlc}_istoric_citiri"
 
-    def _get_readings(self) -> list[dict]:
-        response = self._get_nlc_response("readings")
-        if isinstance(response, list):
-            return response
-        return []
+    def _get_readings(self) -> tuple[Reading, ...]:
+        return self._get_nlc_records("readings") or ()
 
-    def _get_recent_readings(self) -> list[dict]:
+    def _get_recent_readings(self) -> list[Reading]:
         """Cele mai recente 12 citiri (ordine cronologică inversă)."""
-        return list(reversed(self._get_readings()))[:12]
+        return list(reversed(self._get_readings()[-12:]))
 
-    @property
+    @per_update
     def native_value(self):
         if not self._license_valid:
             return "Licență necesară"
         return len(self._get_recent_readings())
 
-    @property
-    def extra_state_attributes(self):
+    @per_update
+    def _attributes(self):
         if not self._license_valid:
             return {"licență": "necesară"}
         recent = self._get_recent_readings()
@@ -547,9 +661,9 @@ class IstoricCitiriSensor(MyElectricaEntity):
 
         attrs = {}
         for reading in recent:
-            date = format_date_ro(reading.get("ReadingDate", ""))
-            index_val = reading.get("Index", "Necunoscut")
-            read_type_raw = reading.get("MeterReadingType", "")
+            date = format_date_ro(reading.reading_date)
+            index_val = reading.index or "Necunoscut"
+            read_type_raw = reading.reading_type
 
             # Traducere tip citire
             if "client" in read_type_raw.lower():
@@ -564,10 +678,10 @@ class IstoricCitiriSensor(MyElectricaEntity):
 
         # Date contor din prima citire disponibilă
         if recent:
-            serie = recent[0].get("SerieContor", "Necunoscut")
-            install_date = recent[0].get("InstallationDate", "")
-            attrs["Serie contor"] = serie
-            attrs["Data instalării"] = format_date_ro(install_date)
+            attrs["Serie contor"] = recent[0].serie_contor or "Necunoscut"
+            attrs["Data instalării"] = format_date_ro(
+                recent[0].installation_date
+            )
 
         attrs["Total citiri"] = str(len(recent))
         attrs["attribution"] = ATTRIBUTION
@@ -580,6 +694,7 @@ class CitirePermisaSensor(MyElectricaEntity):
     """Citire permisă — indică dacă autocitirea este activă (PAC din meter-list)."""
 
     _attr_translation_key = "citire_permisa"
+    _inputs = (("meter_list", "nlc"),)
 
     def __init__(self, coordinator, config_entry, ctx: NlcContext) -> None:
         super().__init__(coordinator, config_entry, ctx)
@@ -587,13 +702,13 @@ class CitirePermisaSensor(MyElectricaEntity):
         self._attr_unique_id = f"{DOMAIN}_{ctx.nlc}_citire_permisa"
         self._custom_entity_id = f"sensor.{DOMAIN}_{ctx.nlc}_citire_permisa"
 
-    def _get_pac_data(self) -> dict | None:
-        """Extrage datele PAC din meter-list (nivelul rădăcină al response-ului)."""
-        return self._get_nlc_response("meter_list")
+    def _get_pac_data(self) -> MeterList | None:
+        """Datele PAC din meter-list (nivelul rădăcină al response-ului)."""
+        return self._get_nlc_records("meter_list")
 
     @property
     def icon(self):
-        """Returnează iconița în funcție de starea senzorului."""
+        """Returnează iconița în funcție de starea (memorizată) a senzorului."""
         value = self.native_value
         if value == "Da":
             return "mdi:clock-check-outline"
@@ -601,31 +716,28 @@ class CitirePermisaSensor(MyElectricaEntity):
             return "mdi:clock-alert-outline"
         return "mdi:cog-stop-outline"
 
-    @property
+    @per_update
     def native_value(self):
         if not self._license_valid:
             return "Licență necesară"
-        response = self._get_pac_data()
-        if not response:
+        meter_list = self._get_pac_data()
+        if meter_list is None:
             return "Nu"
-        return "Da" if response.get("PACIndicator") == "1" else "Nu"
+        return "Da" if meter_list.pac_indicator == "1" else "Nu"
 
-    @property
-    def extra_state_attributes(self):
+    @per_update
+    def _attributes(self):
         if not self._license_valid:
             return {"licență": "necesară"}
-        response = self._get_pac_data()
-        if not response:
+        meter_list = self._get_pac_data()
+        if meter_list is None:
             return {"attribution": ATTRIBUTION}
 
-        start_pac = response.get("StartDatePAC", "")
-        end_pac = response.get("EndDatePAC", "")
-
         attrs = {}
-        if start_pac:
-            attrs["Început perioadă"] = format_date_ro(start_pac)
-        if end_pac:
-            attrs["Sfârșit perioadă"] = format_date_ro(end_pac)
+        if meter_list.start_pac:
+            attrs["Început perioadă"] = format_date_ro(meter_list.start_pac)
+        if meter_list.end_pac:
+            attrs["Sfârșit perioadă"] = format_date_ro(meter_list.end_pac)
 
         attrs["attribution"] = ATTRIBUTION
         return attrs
@@ -638,6 +750,7 @@ class ConventieConsumSensor(MyElectricaEntity):
 
     _attr_icon = "mdi:calendar-clock"
     _attr_translation_key = "conventie_consum"
+    _inputs = (("convention", "nlc"),)
 
     def __init__(self, coordinator, config_entry, ctx: NlcContext) -> None:
         super().__init__(coordinator, config_entry, ctx)
@@ -645,13 +758,10 @@ class ConventieConsumSensor(MyElectricaEntity):
         self._attr_unique_id = f"{DOMAIN}_{ctx.nlc}_conventie_consum"
         self._custom_entity_id = f"sensor.{DOMAIN}_{ctx.nlc}_conventie_consum"
 
-    def _get_convention(self) -> list[dict]:
-        response = self._get_nlc_response("convention")
-        if isinstance(response, list):
-            return response
-        return []
+    def _get_convention(self) -> tuple[ConventionMonth, ...]:
+        return self._get_nlc_records("convention") or ()
 
-    @property
+    @per_update
     def native_value(self):
         """Indică dacă există consum în convenție."""
         if not self._license_valid:
@@ -660,12 +770,12 @@ class ConventieConsumSensor(MyElectricaEntity):
         if not items:
             return "Nu"
 
-        total = sum(safe_float(item.get("Quantity")) for item in items)
+        total = sum(item.quantity for item in items)
 
         return "Da" if total > 0 else "Nu"
 
-    @property
-    def extra_state_attributes(self):
+    @per_update
+    def _attributes(self):
         if not self._license_valid:
             return {"licență": "necesară"}
         items = self._get_convention()
@@ -674,8 +784,8 @@ class ConventieConsumSensor(MyElectricaEntity):
 
         attrs = {}
         for item in items:
-            month_raw = item.get("Month", "")
-            quantity = item.get("Quantity", "0")
+            month_raw = item.month
+            quantity = item.quantity_text
 
             # Lunar poate fi numeric (01-12) sau text (Ianuarie)
             if month_raw.isdigit():
@@ -698,6 +808,7 @@ class ArhivaFacturiSensor(MyElectricaEntity):
 
     _attr_icon = "mdi:file-document-multiple-outline"
     _attr_translation_key = "arhivafacturi"
+    _inputs = (("invoices", "client"),)
 
     def __init__(self, coordinator, config_entry, ctx: NlcContext) -> None:
         super().__init__(coordinator, config_entry, ctx)
@@ -705,28 +816,22 @@ class ArhivaFacturiSensor(MyElectricaEntity):
         self._attr_unique_id = f"{DOMAIN}_{ctx.nlc}_arhivafacturi"
         self._custom_entity_id = f"sensor.{DOMAIN}_{ctx.nlc}_arhivafacturi"
 
-    def _get_invoices(self) -> list[dict]:
+    def _get_invoices(self) -> tuple[Invoice, ...]:
         """Facturi filtrate pe ContractAccount al acestui NLC."""
-        response = self._get_client_response("invoices")
-        if not isinstance(response, list):
-            return []
-        ca = self._ctx.contract_account
-        if not ca:
-            return response
-        return [f for f in response if f.get("ContractAccount") == ca]
-
-    def _get_recent_invoices(self) -> list[dict]:
+        return self._get_billing_view().invoices
+
+    def _get_recent_invoices(self) -> list[Invoice]:
         """Cele mai recente 12 facturi (ordine cronologică inversă)."""
-        return list(reversed(self._get_invoices()))[:12]
+        return list(reversed(self._get_invoices()[-12:]))
 
-    @property
+    @per_update
     def native_value(self):
         if not self._license_valid:
             return "Licență necesară"
         return len(self._get_recent_invoices())
 
-    @property
-    def extra_state_attributes(self):
+    @per_update
+    def _attributes(self):
         if not self._license_valid:
             return {"licență": "necesară"}
         recent = self._get_recent_invoices()
@@ -737,8 +842,8 @@ class ArhivaFacturiSensor(MyElectricaEntity):
         total = 0.0
 
         for idx, inv in enumerate(recent, start=1):
-            date = format_date_ro(inv.get("IssueDate", ""))
-            amount = safe_float(inv.get("TotalAmount"))
+            date = format_date_ro(inv.issue_date)
+            amount = inv.total_amount
             total += amount
 
             label = f"Emisă pe {date}"
@@ -759,6 +864,7 @@ class FacturaRestantaSensor(MyElectricaEntity):
 
     _attr_icon = "mdi:file-document-alert-outline"
     _attr_translation_key = "factura_restanta"
+    _inputs = (("invoices", "client"),)
 
     def __init__(self, coordinator, config_entry, ctx: NlcContext) -> None:
         super().__init__(coordinator, config_entry, ctx)
@@ -766,24 +872,15 @@ class FacturaRestantaSensor(MyElectricaEntity):
         self._attr_unique_id = f"{DOMAIN}_{ctx.nlc}_factura_restanta"
         self._custom_entity_id = f"sensor.{DOMAIN}_{ctx.nlc}_factura_restanta"
 
-    def _facturi_neachitate(self) -> list[dict]:
+    def _memo_extra_key(self) -> Any:
+        """Zilele până la scadență se schimbă la miezul nopții."""
+        return dt_util.now().date()
+
+    def _facturi_neachitate(self) -> tuple[Invoice, ...]:
         """Facturi neachitate pentru ContractAccount-ul acestui NLC."""
-        response = self._get_client_response("invoices")
-        if not isinstance(response, list):
-            return []
-        ca = self._ctx.contract_account
-        result = []
-        for f in response:
-            if ca and f.get("ContractAccount") != ca:
-                continue
-            status = (f.get("InvoiceStatus") or "").lower()
-            if status in ("neachitat", "neachitata", "neplătit"):
-                unpaid = safe_float(f.get("UnpaidValue"))
-                if unpaid > 0:
-                    result.append(f)
-        return result
+        return self._get_billing_view().unpaid
 
-    @property
+    @per_update
     def native_value(self):
         """Există factură restantă? Da/Nu."""
         if not self._license_valid:
@@ -791,8 +888,8 @@ class FacturaRestantaSensor(MyElectricaEntity):
         neachitate = self._facturi_neachitate()
         return "Da" if neachitate else "Nu"
 
-    @property
-    def extra_state_attributes(self):
+    @per_update
+    def _attributes(self):
         """Detalii facturi neachitate și total."""
         if not self._license_valid:
             return {"licență": "necesară"}
@@ -800,29 +897,24 @@ class FacturaRestantaSensor(MyElectricaEntity):
         today = dt_util.now().date()
         attrs = {}
 
-        total = sum(safe_float(f.get("UnpaidValue")) for f in neachitate)
+        total = sum(f.unpaid_value for f in neachitate)
 
         if not neachitate:
             attrs["Total neachitat"] = "0,00 lei"
         else:
             for idx, factura in enumerate(neachitate, start=1):
-                unpaid = safe_float(factura.get("UnpaidValue"))
+                unpaid = factura.unpaid_value
 
                 # Luna din IssueDate
-                issue_raw = factura.get("IssueDate", "")
                 month_name = "necunoscut"
-                try:
-                    parsed_issue = datetime.strptime(issue_raw, "%Y-%m-%d")
-                    month_number = parsed_issue.strftime("%m")
-                    month_name = MONTHS_NUM_RO.get(month_number, "necunoscut")
-                except (ValueError, TypeError):
-                    pass
+                if factura.issue_date is not None:
+                    month_name = MONTHS_NUM_RO.get(
+                        f"{factura.issue_date.month:02d}", "necunoscut"
+                    )
 
                 # Calcul scadență
-                due_raw = factura.get("DueDate")
-                try:
-                    parsed_due = datetime.strptime(due_raw, "%Y-%m-%d")
-                    days_until = (parsed_due.date() - today).days
+                if factura.due_date is not None:
+                    days_until = (factura.due_date - today).days
 
                     if days_until < 0:
                         unit = "zi" if abs(days_until) == 1 else "zile"
@@ -838,7 +930,7 @@ class FacturaRestantaSensor(MyElectricaEntity):
                             f"{format_ron(unpaid)} lei — scadentă în "
                             f"{days_until} {unit}"
                         )
-                except (ValueError, TypeError):
+                else:
                     msg = f"{format_ron(unpaid)} lei — scadență necunoscută"
 
                 attrs[f"Restanță luna {month_name} (#{idx})"] = msg
@@ -855,13 +947,14 @@ class ArhivaPlatiSensor(MyElectricaEntity):
     """
     Arhivă plăți (5.1 — client-code-payments), filtrate per NLC.
 
-    API-ul returnează plățile per cod client.  Filtrăm per NLC
-    corelând FiscalNumber / InvoiceID din plăți cu cele din facturile
-    care aparțin ContractAccount-ului acestui NLC.
+    API-ul returnează plățile per cod client.  Filtrarea per NLC
+    (corelarea FiscalNumber / InvoiceID din plăți cu facturile
+    ContractAccount-ului acestui NLC) este precalculată în BillingView.
     """
 
     _attr_icon = "mdi:cash-check"
     _attr_translation_key = "arhiva_plati"
+    _inputs = (("invoices", "client"), ("payments", "client"))
 
     def __init__(self, coordinator, config_entry, ctx: NlcContext) -> None:
         super().__init__(coordinator, config_entry, ctx)
@@ -869,62 +962,22 @@ class ArhivaPlatiSensor(MyElectricaEntity):
         self._attr_unique_id = f"{DOMAIN}_{ctx.nlc}_arhivaplati"
         self._custom_entity_id = f"sensor.{DOMAIN}_{ctx.nlc}_arhivaplati"
 
-    def _get_nlc_invoice_keys(self) -> set[str]:
-        """
-        Colectează FiscalNumber + InvoiceID din facturile
-        care aparțin ContractAccount-ului acestui NLC.
-        Le folosim pentru a filtra plățile.
-        """
-        keys: set[str] = set()
-        response = self._get_client_response("invoices")
-        if not isinstance(response, list):
-            return keys
-
-        ca = self._ctx.contract_account
-        for inv in response:
-            if ca and inv.get("ContractAccount") != ca:
-                continue
-            fiscal = inv.get("FiscalNumber", "")
-            inv_id = inv.get("InvoiceID", "")
-            if fiscal:
-                keys.add(fiscal)
-            if inv_id:
-                keys.add(inv_id)
-
-        return keys
-
-    def _get_payments(self) -> list[dict]:
+    def _get_payments(self) -> tuple[Payment, ...]:
         """Plăți filtrate per NLC (prin FiscalNumber/InvoiceID din facturi)."""
-        response = self._get_client_response("payments")
-        if not isinstance(response, list):
-            return []
+        return self._get_billing_view().payments
 
-        invoice_keys = self._get_nlc_invoice_keys()
-        if not invoice_keys:
-            # Dacă nu avem facturi pentru acest NLC, nu returnăm plăți
-            return []
-
-        filtered = []
-        for pay in response:
-            fiscal = pay.get("FiscalNumber", "")
-            inv_id = pay.get("InvoiceID", "")
-            if fiscal in invoice_keys or inv_id in invoice_keys:
-                filtered.append(pay)
-
-        return filtered
-
-    def _get_recent_payments(self) -> list[dict]:
+    def _get_recent_payments(self) -> list[Payment]:
         """Cele mai recente 12 plăți (ordine cronologică inversă)."""
-        return list(reversed(self._get_payments()))[:12]
+        return list(reversed(self._get_payments()[-12:]))
 
-    @property
+    @per_update
     def native_value(self):
         if not self._license_valid:
             return "Licență necesară"
         return len(self._get_recent_payments())
 
-    @property
-    def extra_state_attributes(self):
+    @per_update
+    def _attributes(self):
         if not self._license_valid:
             return {"licență": "necesară"}
         recent = self._get_recent_payments()
@@ -938,8 +991,8 @@ class ArhivaPlatiSensor(MyElectricaEntity):
         total = 0.0
 
         for idx, pay in enumerate(recent, start=1):
-            date = format_date_ro(pay.get("PaymentDate", ""))
-            amount = safe_float(pay.get("PaidValue"))
+            date = format_date_ro(pay.payment_date)
+            amount = pay.paid_value
             total += amount
 
             label = f"Plătită pe {date}"
@@ -951,3 +1004,68 @@ class ArhivaPlatiSensor(MyElectricaEntity):
         attrs["Total plătit"] = f"{format_ron(total)} lei"
         attrs["attribution"] = ATTRIBUTION
         return attrs
+
+
+# ── UrmatoareaActualizareSensor (diagnostic, per intrare) ─
+
+class UrmatoareaActualizareSensor(ChangeAwareEntity, SensorEntity):
+    """Momentul următorului refresh programat al contului (eșalonat)."""
+
+    _attr_has_entity_name = False
+    _attr_icon = "mdi:update"
+    _attr_translation_key = "urmatoarea_actualizare"
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    # Intrările sunt programarea coordinator-ului, nu bucket-uri de date
+    _inputs = ()
+
+    def __init__(
+        self, coordinator: MyElectricaCoordinator, config_entry: ConfigEntry
+    ) -> None:
+        super().__init__(coordinator)
+        self._config_entry = config_entry
+        account = slugify(config_entry.data["username"])
+        self._attr_name = "Următoarea actualizare"
+        self._attr_unique_id = (
+            f"{DOMAIN}_{config_entry.entry_id}_urmatoarea_actualizare"
+        )
+        self.entity_id = f"sensor.{DOMAIN}_{account}_urmatoarea_actualizare"
+
+    def _input_signature(self) -> tuple:
+        """Disponibilitate + momentul și parametrii programării."""
+        schedule = self.coordinator.schedule_info
+        return (
+            self.available,
+            _is_license_valid(self.hass),
+            self.coordinator.next_refresh,
+            schedule["interval_s"],
+            schedule["faza_s"],
+        )
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Device-ul contului (comun tuturor NLC-urilor intrării)."""
+        return DeviceInfo(
+            identifiers={(DOMAIN, f"cont_{self._config_entry.entry_id}")},
+            name=f"MyElectrica {self._config_entry.data['username']}",
+            manufacturer="Ciprian Nicolae (cnecrea)",
+            model="MyElectrica România",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    @property
+    def native_value(self):
+        if not _is_license_valid(self.hass):
+            return None
+        return self.coordinator.next_refresh
+
+    @property
+    def extra_state_attributes(self):
+        if not _is_license_valid(self.hass):
+            return {"licență": "necesară"}
+        schedule = self.coordinator.schedule_info
+        return {
+            "Interval actualizare": f"{schedule['interval_s']} s",
+            "Decalaj în interval": f"{schedule['faza_s']} s",
+            "attribution": ATTRIBUTION,
+        }
@@ -0,0 +1,188 @@
+"""
+Persistență locală pentru integrarea MyElectrica România.
+
+TokenStore — cache-ul token-urilor de sesiune (app_token), per cont:
+  - un singur Store partajat de toate intrările (cheia = email-ul contului)
+  - păstrează token-ul și momentul expirării, NU credențialele
+  - token-ul restaurat este validat leneș: primul 401 declanșează login
+
+SnapshotStore — ultimul set bun de date al coordinator-ului, per intrare:
+  - răspunsurile (compacte) ale fiecărui bucket + ierarhia
+  - restaurat la pornire, ca entitățile să aibă imediat ultimele valori,
+    în timp ce refresh-ul real rulează în fundal
+  - o singură instanță per intrare: scrierea amânată este efectuată la
+    descărcare și anulată la ștergerea intrării
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+TOKEN_STORAGE_KEY = "myelectrica_tokens"
+TOKEN_STORAGE_VERSION = 1
+
+# Salvarea este amânată ușor ca să grupăm scrierile mai multor conturi
+TOKEN_SAVE_DELAY = 5
+
+SNAPSHOT_STORAGE_KEY = "myelectrica_snapshot"
+SNAPSHOT_STORAGE_VERSION = 1
+
+# Snapshot-ul se scrie amânat — refresh-urile apropiate produc o singură
+# scriere (HA salvează oricum scrierile amânate la oprire)
+SNAPSHOT_SAVE_DELAY = 60
+
+# Cheia din hass.data — în afara hass.data[DOMAIN], care se șterge
+# la descărcarea ultimei intrări (scrierile amânate trebuie păstrate)
+TOKEN_STORE_DATA_KEY = f"{DOMAIN}_token_store"
+SNAPSHOT_STORES_DATA_KEY = f"{DOMAIN}_snapshot_stores"
+
+
+class TokenStore:
+    """Cache persistent al token-urilor de sesiune, per cont."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass, TOKEN_STORAGE_VERSION, TOKEN_STORAGE_KEY
+        )
+        self._data: dict[str, dict[str, Any]] | None = None
+        self._load_lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return username.strip().lower()
+
+    async def _async_ensure_loaded(self) -> dict[str, dict[str, Any]]:
+        """Încarcă fișierul o singură dată (partajat între conturi)."""
+        if self._data is not None:
+            return self._data
+        async with self._load_lock:
+            if self._data is None:
+                stored = await self._store.async_load()
+                self._data = stored if isinstance(stored, dict) else {}
+                _LOGGER.debug(
+                    "[MyElectrica] Token-uri restaurate din storage: %d",
+                    len(self._data),
+                )
+        return self._data
+
+    async def async_get(self, username: str) -> dict[str, Any] | None:
+        """Returnează înregistrarea salvată pentru cont (sau None)."""
+        data = await self._async_ensure_loaded()
+        record = data.get(self._key(username))
+        return dict(record) if isinstance(record, dict) else None
+
+    async def async_set(
+        self, username: str, record: dict[str, Any] | None
+    ) -> None:
+        """Actualizează (sau șterge, dacă record=None) token-ul unui cont."""
+        # Citim fișierul înainte de prima scriere, ca să nu pierdem
+        # token-urile celorlalte conturi
+        data = await self._async_ensure_loaded()
+        key = self._key(username)
+        if record is None:
+            if data.pop(key, None) is None:
+                return
+        elif data.get(key) == record:
+            return
+        else:
+            data[key] = record
+        self._store.async_delay_save(self._data_to_save, TOKEN_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, dict[str, Any]]:
+        return self._data or {}
+
+
+@callback
+def async_get_token_store(hass: HomeAssistant) -> TokenStore:
+    """Returnează instanța TokenStore partajată (o creează la nevoie)."""
+    store: TokenStore | None = hass.data.get(TOKEN_STORE_DATA_KEY)
+    if store is None:
+        store = TokenStore(hass)
+        hass.data[TOKEN_STORE_DATA_KEY] = store
+    return store
+
+
+class SnapshotStore:
+    """Snapshot-ul persistent al datelor unei intrări."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass,
+            SNAPSHOT_STORAGE_VERSION,
+            f"{SNAPSHOT_STORAGE_KEY}.{entry_id}",
+        )
+        # Funcția scrierii amânate încă neefectuate (None = nimic în așteptare)
+        self._pending: Callable[[], dict[str, Any]] | None = None
+
+    async def async_load(self) -> dict[str, Any] | None:
+        """Returnează snapshot-ul salvat (sau None)."""
+        try:
+            stored = await self._store.async_load()
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.warning(
+                "[MyElectrica] Snapshot-ul salvat nu poate fi citit: %s", err
+            )
+            return None
+        return stored if isinstance(stored, dict) else None
+
+    @callback
+    def async_schedule_save(
+        self, data_func: Callable[[], dict[str, Any]]
+    ) -> None:
+        """Programează scrierea (amânată); data_func se evaluează la scriere."""
+        self._pending = data_func
+        self._store.async_delay_save(
+            self._async_pending_data, SNAPSHOT_SAVE_DELAY
+        )
+
+    @callback
+    def _async_pending_data(self) -> dict[str, Any]:
+        data_func, self._pending = self._pending, None
+        return data_func() if data_func is not None else {}
+
+    async def async_flush(self) -> None:
+        """Scrie imediat salvarea amânată (la descărcarea intrării)."""
+        if self._pending is None:
+            return
+        # async_save anulează și timer-ul scrierii amânate
+        await self._store.async_save(self._async_pending_data())
+
+    async def async_remove(self) -> None:
+        """Șterge fișierul și anulează scrierea amânată (intrare eliminată)."""
+        self._pending = None
+        await self._store.async_remove()
+
+
+@callback
+def async_get_snapshot_store(hass: HomeAssistant, entry_id: str) -> SnapshotStore:
+    """
+    Returnează SnapshotStore-ul intrării (îl creează la nevoie).
+
+    Aceeași instanță servește coordinator-ul și ștergerea la eliminarea
+    intrării, astfel încât o scriere amânată să nu recreeze fișierul.
+    """
+    stores: dict[str, SnapshotStore] = hass.data.setdefault(
+        SNAPSHOT_STORES_DATA_KEY, {}
+    )
+    store = stores.get(entry_id)
+    if store is None:
+        store = stores[entry_id] = SnapshotStore(hass, entry_id)
+    return store
+
+
+async def async_remove_snapshot(hass: HomeAssistant, entry_id: str) -> None:
+    """Șterge snapshot-ul unei intrări eliminate."""
+    store = async_get_snapshot_store(hass, entry_id)
+    await store.async_remove()
+    hass.data[SNAPSHOT_STORES_DATA_KEY].pop(entry_id, None)